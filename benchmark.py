@@ -0,0 +1,815 @@
+"""
+Offline benchmark for the Airtable → Google Slides sync.
+
+Runs main() and update_presentation_with_slide against in-process stand-ins
+for the Slides v1 service and pyairtable, on synthetic decks and bases, and
+reports wall time, API call counts, payload bytes and peak memory, plus the
+cold startup of a fresh interpreter importing main and a micro-benchmark of
+the people cell layout:
+
+    python benchmark.py --sizes 100 1000 --json bench_output.json
+"""
+import argparse
+import contextlib
+import copy
+import datetime
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+import main
+
+PRESENTATION_ID = "bench-presentation"
+TEMPLATE_SLIDE_ID = "template"
+
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances", "Ken", "Radia", "Tim",
+               "Margaret", "Linus", "Guido", "Katherine", "John", "Sophie", "Dennis", "Shafi", "Leslie", "Niklaus"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen", "Thompson", "Perlman",
+              "Berners-Lee", "Hamilton", "Torvalds", "van Rossum", "Johnson", "McCarthy", "Wilson", "Ritchie"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Soylent"]
+TITLES = ["CEO", "CTO", "VP Engineering", "Head of Product", "Founder", "Director", "Principal Engineer"]
+CHANNELS = ["Main Stage", "Workshop Room", "Founders Track", "AI Track", "Fireside"]
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua").split()
+
+
+# ================================================
+# Fake: HTTP errors shaped like googleapiclient / requests errors
+# ================================================
+class FakeResponse(dict):
+    def __init__(self, status: int, headers: dict = None):
+        super().__init__(headers or {})
+        self.status = status
+        self.status_code = status
+        self.headers = self
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(f"<HttpError {status}: {message}>")
+        self.resp = FakeResponse(status, headers)
+        self.response = self.resp
+
+
+# ================================================
+# Fake: Google Slides v1 service
+# ================================================
+def _text_content(text: str, colors: list) -> dict:
+    """A text body for a text model, built by main's own model of Slides text."""
+    text_content = {}
+    main._set_text_model(text_content, text, colors)
+    return text_content
+
+
+class _Call:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self, **kwargs):
+        return self.fn()
+
+
+class FakeSlidesService:
+    """
+    In-process stand-in for build('slides', 'v1'). Holds presentations as API
+    shaped slides, applies the batchUpdate requests the sync sends and counts
+    calls and payload bytes. Field masks are not applied: get() returns the
+    whole deck. Cell and shape text use main's model of Slides text, so the
+    fake checks request handling, not that model. `error_rate` makes that share of calls fail with a 429 to
+    exercise the retry layer.
+    """
+
+    def __init__(self, presentations: dict, error_rate: float = 0.0, seed: int = 0):
+        self.decks = {presentation_id: self._load(presentation)
+                      for presentation_id, presentation in presentations.items()}
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"get": 0, "batchUpdate": 0, "requests": 0, "bytesSent": 0, "bytesReceived": 0, "errors": 0}
+
+    def presentations(self):
+        return _FakePresentations(self)
+
+    def presentation(self, presentation_id: str) -> dict:
+        """The current presentation as the API would return it."""
+        deck = self.decks[presentation_id]
+        return {
+            "presentationId": presentation_id,
+            "revisionId": deck["revisionId"],
+            "slides": [deck["slides"][slide_id] for slide_id in deck["order"]],
+        }
+
+    # --- Internals ---
+    @staticmethod
+    def _object_ids(slide: dict):
+        yield slide["objectId"]
+        for element in slide.get("pageElements", []):
+            yield element["objectId"]
+        for element in slide.get("slideProperties", {}).get("notesPage", {}).get("pageElements", []):
+            yield element["objectId"]
+
+    def _load(self, presentation: dict) -> dict:
+        deck = {"revisionId": presentation.get("revisionId", "rev1"), "order": [], "slides": {}, "objects": {}}
+        for slide in presentation["slides"]:
+            deck["order"].append(slide["objectId"])
+            deck["slides"][slide["objectId"]] = slide
+            for object_id in self._object_ids(slide):
+                deck["objects"][object_id] = slide["objectId"]
+        return deck
+
+    def _maybe_fail(self):
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            raise FakeHttpError(429, "Quota exceeded", {"retry-after": "0"})
+
+    def _get(self, presentation_id: str, fields: str = None) -> dict:
+        with self.lock:
+            self.stats["get"] += 1
+            self._maybe_fail()
+            if fields == "revisionId":
+                payload = json.dumps({"revisionId": self.decks[presentation_id]["revisionId"]})
+            else:
+                payload = json.dumps(self.presentation(presentation_id))
+            self.stats["bytesReceived"] += len(payload)
+        return json.loads(payload)
+
+    def _batch_update(self, presentation_id: str, body: dict) -> dict:
+        payload = json.dumps(body)
+        with self.lock:
+            self.stats["batchUpdate"] += 1
+            self.stats["requests"] += len(body.get("requests", []))
+            self.stats["bytesSent"] += len(payload)
+            self._maybe_fail()
+            deck = self.decks[presentation_id]
+            required = body.get("writeControl", {}).get("requiredRevisionId")
+            if required and required != deck["revisionId"]:
+                raise FakeHttpError(400, f"The required revision ID '{required}' does not match the latest "
+                                         f"revision '{deck['revisionId']}'.")
+            # batchUpdate is atomic: apply to a copy-on-write view of the deck
+            # and keep it only if every request succeeds.
+            working = {"order": list(deck["order"]), "slides": dict(deck["slides"]),
+                       "objects": dict(deck["objects"]), "copied": set()}
+            replies = [self._apply(working, request) for request in body.get("requests", [])]
+            revision = f"rev{int(deck['revisionId'][3:]) + 1}"
+            self.decks[presentation_id] = {"revisionId": revision, "order": working["order"],
+                                           "slides": working["slides"], "objects": working["objects"]}
+        return {
+            "presentationId": presentation_id,
+            "replies": replies,
+            "writeControl": {"requiredRevisionId": revision},
+        }
+
+    @staticmethod
+    def _find(working: dict, object_id: str):
+        """Returns (slide, element) for an object id, copying the slide before it is changed."""
+        slide_id = working["objects"].get(object_id)
+        if slide_id is None:
+            raise FakeHttpError(400, f"The object ({object_id}) could not be found.")
+        if slide_id not in working["copied"]:
+            working["slides"][slide_id] = copy.deepcopy(working["slides"][slide_id])
+            working["copied"].add(slide_id)
+        slide = working["slides"][slide_id]
+        if object_id == slide_id:
+            return slide, slide
+        elements = slide.get("pageElements", []) + slide.get("slideProperties", {}).get("notesPage", {}).get(
+            "pageElements", [])
+        return slide, next(element for element in elements if element["objectId"] == object_id)
+
+    def _text_target(self, working: dict, request: dict) -> dict:
+        _, element = self._find(working, request["objectId"])
+        if "cellLocation" in request:
+            location = request["cellLocation"]
+            try:
+                cell = element["table"]["tableRows"][location["rowIndex"]]["tableCells"][location["columnIndex"]]
+            except (KeyError, IndexError):
+                raise FakeHttpError(400, "Invalid cell location.")
+            return cell.setdefault("text", {})
+        if "shape" not in element:
+            raise FakeHttpError(400, f"The object ({request['objectId']}) has no text.")
+        return element["shape"].setdefault("text", {})
+
+    def _apply(self, working: dict, request: dict) -> dict:
+        kind, params = next(iter(request.items()))
+        if kind == "duplicateObject":
+            slide, _ = self._find(working, params["objectId"])
+            id_map = params.get("objectIds", {})
+            serial = len(working["order"])
+            clone = copy.deepcopy(slide)
+
+            def new_id(old_id):
+                new = id_map.get(old_id, f"{old_id}_copy{serial}")
+                if new in working["objects"]:
+                    raise FakeHttpError(400, f"The object ID ({new}) should be unique.")
+                return new
+
+            clone["objectId"] = new_id(slide["objectId"])
+            for element in clone.get("pageElements", []):
+                element["objectId"] = new_id(element["objectId"])
+            for element in clone.get("slideProperties", {}).get("notesPage", {}).get("pageElements", []):
+                element["objectId"] = new_id(element["objectId"])
+            working["order"].insert(working["order"].index(slide["objectId"]) + 1, clone["objectId"])
+            working["slides"][clone["objectId"]] = clone
+            working["copied"].add(clone["objectId"])
+            for object_id in self._object_ids(clone):
+                working["objects"][object_id] = clone["objectId"]
+            return {"duplicateObject": {"objectId": clone["objectId"]}}
+        if kind == "insertText":
+            target = self._text_target(working, params)
+            text, colors = main._text_model(target)
+            index = params.get("insertionIndex", 0)
+            if index > len(text) - 1:
+                raise FakeHttpError(400, "Insertion index out of range.")
+            inherited = colors[index - 1] if index else None
+            text = text[:index] + params["text"] + text[index:]
+            colors = colors[:index] + [inherited] * len(params["text"]) + colors[index:]
+            main._set_text_model(target, text, colors)
+            return {}
+        if kind == "deleteText":
+            target = self._text_target(working, params)
+            main._set_text_model(target, "\n", [None])
+            return {}
+        if kind == "updateTextStyle":
+            target = self._text_target(working, params)
+            text, colors = main._text_model(target)
+            text_range = params["textRange"]
+            if text_range["type"] == "ALL":
+                start, end = 0, len(text)
+            else:
+                start, end = text_range["startIndex"], text_range["endIndex"]
+                if not 0 <= start <= end <= len(text):
+                    raise FakeHttpError(400, "Text range out of bounds.")
+            rgb = params["style"].get("backgroundColor", {}).get("opaqueColor", {}).get("rgbColor")
+            colors[start:end] = [rgb] * (end - start)
+            main._set_text_model(target, text, colors)
+            return {}
+        if kind == "updateSlidesPosition":
+            slide_ids = params["slideObjectIds"]
+            index = params.get("insertionIndex", 0)
+            if not slide_ids or any(working["objects"].get(slide_id) != slide_id for slide_id in slide_ids):
+                raise FakeHttpError(400, "Invalid slide ids.")
+            if not 0 <= index <= len(working["order"]):
+                raise FakeHttpError(400, "Insertion index out of range.")
+            index -= sum(1 for slide_id in working["order"][:index] if slide_id in slide_ids)
+            rest = [slide_id for slide_id in working["order"] if slide_id not in slide_ids]
+            working["order"] = rest[:index] + slide_ids + rest[index:]
+            return {}
+        if kind == "updatePageProperties":
+            slide, _ = self._find(working, params["objectId"])
+            slide.setdefault("pageProperties", {}).update(copy.deepcopy(params["pageProperties"]))
+            return {}
+        raise FakeHttpError(400, f"Unsupported request {kind}.")
+
+
+class FakeHttpPool(main.HttpPool):
+    """main.HttpPool with placeholder connections: the pool logic runs, the fake service ignores `http`."""
+
+    def _connect(self):
+        return object()
+
+
+class _FakePresentations:
+    def __init__(self, service: FakeSlidesService):
+        self.service = service
+
+    def get(self, presentationId: str, fields: str = None):
+        return _Call(lambda: self.service._get(presentationId, fields))
+
+    def batchUpdate(self, presentationId: str, body: dict):
+        return _Call(lambda: self.service._batch_update(presentationId, body))
+
+
+# ================================================
+# Fake: pyairtable Api
+# ================================================
+class FakeAirtableApi:
+    """
+    In-process stand-in for pyairtable.Api over {table name: [records]}.
+    Understands the formulas the sync builds (IS_AFTER on Last Modified, a
+    non-empty Slide ID and RECORD_ID() lists) and honors field projection.
+    List-records calls numbered in `fail_requests` fail once with a 503,
+    which pyairtable does not retry itself.
+    """
+
+    def __init__(self, tables: dict):
+        self.tables = tables
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "bytesReceived": 0, "listRecords": 0}
+        self.fail_requests = set()
+
+    def __call__(self, api_key=None):
+        return self
+
+    def table(self, base_id: str, table_name: str):
+        return FakeTable(self, table_name)
+
+    def request(self, method: str, url: str, fallback: tuple = None, options: dict = None, **kwargs) -> dict:
+        """One page of List records, continued by `offset`, as Api.request returns it."""
+        options = options or {}
+        table = FakeTable(self, url.rsplit("/", 1)[-1])
+        with self.lock:
+            self.stats["listRecords"] += 1
+            if self.stats["listRecords"] in self.fail_requests:
+                self.fail_requests.discard(self.stats["listRecords"])
+                raise FakeHttpError(503, "Service Unavailable")
+        records = table._select(options.get("formula"), options.get("fields"))
+        start = int(options.get("offset") or 0)
+        end = start + options.get("page_size", 100)
+        table._count(records[start:end])
+        response = {"records": records[start:end]}
+        if end < len(records):
+            response["offset"] = str(end)
+        return response
+
+
+class FakeTable:
+    def __init__(self, api: FakeAirtableApi, name: str):
+        self.api = api
+        self.name = name
+        self.urls = types.SimpleNamespace(records=f"fake://airtable/{name}",
+                                          records_post=f"fake://airtable/{name}/listRecords")
+
+    def _count(self, records: list):
+        with self.api.lock:
+            self.api.stats["requests"] += 1
+            self.api.stats["bytesReceived"] += len(json.dumps(records))
+
+    def _select(self, formula: str = None, fields: list = None) -> list:
+        records = self.api.tables.get(self.name, [])
+        if formula:
+            ids = re.findall(r"RECORD_ID\(\) = '([^']+)'", formula)
+            after = re.search(r"IS_AFTER\(\{Last Modified\}, '([^']+)'\)", formula)
+            if ids:
+                wanted = set(ids)
+                records = [r for r in records if r["id"] in wanted]
+            if after:
+                records = [r for r in records if r["fields"].get("Last Modified", "") > after.group(1)]
+            for name in re.findall(r"[(,]\s*\{([^}]+)\}\s*[,)]", formula):
+                records = [r for r in records if r["fields"].get(name)]
+        if fields:
+            records = [{"id": r["id"], "createdTime": r.get("createdTime", ""),
+                        "fields": {k: v for k, v in r["fields"].items() if k in fields}} for r in records]
+        return copy.deepcopy(records)
+
+    def iterate(self, formula: str = None, fields: list = None, page_size: int = 100, **kwargs):
+        records = self._select(formula, fields)
+        # Like pyairtable, an empty result is still one request and one (empty) page.
+        for i in range(0, max(len(records), 1), page_size):
+            page = records[i:i + page_size]
+            self._count(page)
+            yield page
+
+    def all(self, formula: str = None, fields: list = None, **kwargs) -> list:
+        records = []
+        for page in self.iterate(formula, fields, kwargs.get("page_size", 100)):
+            records.extend(page)
+        return records
+
+    def get(self, record_id: str) -> dict:
+        for record in self.api.tables.get(self.name, []):
+            if record["id"] == record_id:
+                self._count([record])
+                return copy.deepcopy(record)
+        raise FakeHttpError(404, f"Record {record_id} not found.")
+
+    def batch_update(self, records: list, **kwargs) -> list:
+        by_id = {r["id"]: r for r in self.api.tables.get(self.name, [])}
+        updated = []
+        for i in range(0, len(records), 10):
+            chunk = records[i:i + 10]
+            self._count(chunk)
+            for record in chunk:
+                by_id[record["id"]]["fields"].update(record["fields"])
+                updated.append(copy.deepcopy(by_id[record["id"]]))
+        return updated
+
+
+# ================================================
+# Synthetic data
+# ================================================
+def _person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} ({rng.choice(TITLES)},{rng.choice(COMPANIES)})"
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _slide(slide_id: str, state: dict = None) -> dict:
+    """A template-shaped slide (2x6 table + notes page), optionally rendered with a slide state."""
+    labels = ["Title", "Date", "Channel", "Description", "Moderators", "Speakers"]
+    rows = []
+    for row_idx, label in enumerate(labels):
+        value = state["cells"][row_idx] if state else ""
+        colors = [None] * (len(value) + 1)
+        if state and row_idx in state["runs"]:
+            for run in state["runs"][row_idx]:
+                colors[run["startIndex"]:run["endIndex"]] = (
+                    [main.COLORS[run["color"]]] * (run["endIndex"] - run["startIndex"]))
+        rows.append({"tableCells": [
+            {"text": _text_content(label + "\n", [None] * (len(label) + 1))},
+            {"text": _text_content(value + "\n", colors)},
+        ]})
+    notes = state["notes"] if state else ""
+    slide = {
+        "objectId": slide_id,
+        "pageElements": [
+            {"objectId": f"{slide_id}_title", "shape": {"text": _text_content("Session\n", [None] * 8)}},
+            {"objectId": f"{slide_id}_table", "table": {"rows": 6, "columns": 2, "tableRows": rows}},
+        ],
+        "slideProperties": {"notesPage": {"pageElements": [
+            {"objectId": f"{slide_id}_notes_image"},
+            {"objectId": f"{slide_id}_notes", "shape": {"text": _text_content(notes + "\n", [None] * (len(notes) + 1))}},
+        ]}},
+    }
+    if state:
+        slide["pageProperties"] = {"pageBackgroundFill": {"solidFill": {"color": {"rgbColor": state["background"]}}}}
+    return slide
+
+
+def generate_dataset(sessions: int, seed: int = 0, stale_fraction: float = 0.3,
+                     modified_fraction: float = 1.0, decks: int = 1) -> dict:
+    """
+    Builds a synthetic base and deck: `sessions` Sessions records (with long
+    unrendered fields) linked to a pool of Speaker records, a small status
+    table, and a deck holding a template slide plus one slide per session.
+    A `stale_fraction` of the slides show an older title; `modified_fraction`
+    of the sessions count as recently modified. With decks > 1 the sessions
+    are spread over that many decks by channel, with matching DECK_ROUTES.
+    """
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.UTC)
+    last_week = main.format_airtable_time(now - datetime.timedelta(days=7))
+    statuses = [{"id": f"recStatus{i:03d}", "fields": {"Status": name}} for i, name in enumerate(
+        ["(1) Idea", "(2) Outreach", "(3) Drafting", "(4) Review", "(5) Confirmed",
+         "(6) Cancelled", "(7) Hold", "(8) Merged", "(9) Backup", "(10) Archived"])]
+    status_names = {s["id"]: s["fields"]["Status"] for s in statuses}
+    people_statuses = list(main.status_to_color_map)
+    people = [{"id": f"recSpeaker{i:07d}", "createdTime": "", "fields": {
+        "Name & Title": _person(rng), "S Status": rng.choice(people_statuses), "Last Modified": last_week,
+    }} for i in range(max(20, sessions))]
+    deck_ids = [PRESENTATION_ID] if decks <= 1 else [f"{PRESENTATION_ID}-{d}" for d in range(decks)]
+    routes = {} if decks <= 1 else {channel: {"presentationId": deck_ids[i % decks], "templateSlideId": TEMPLATE_SLIDE_ID}
+                                    for i, channel in enumerate(CHANNELS)}
+    deck_slides = {deck_id: [_slide(TEMPLATE_SLIDE_ID)] for deck_id in deck_ids}
+    records = []
+    for i in range(sessions):
+        speakers = rng.sample(people, rng.randint(1, 4))
+        moderators = rng.sample(people, rng.randint(0, 1))
+        modified = now - datetime.timedelta(minutes=5 if rng.random() < modified_fraction else 60 * 24 * 7)
+        fields = {
+            "Slide ID": f"slide{i:05d}",
+            "Curation Status": [rng.choice(statuses)["id"]],
+            "Speaker": [p["id"] for p in speakers],
+            "Moderator": [p["id"] for p in moderators],
+            "Speaker Name & Title (from Speaker)": [p["fields"]["Name & Title"] for p in speakers],
+            "Moderator Name & Title": [p["fields"]["Name & Title"] for p in moderators],
+            "S Status (from Speaker)": [p["fields"]["S Status"] for p in speakers],
+            "S Status (from Moderator)": [p["fields"]["S Status"] for p in moderators],
+            "S25 Start Date/Time": (now + datetime.timedelta(hours=rng.randint(0, 72))).strftime("%Y-%m-%d %H:%M"),
+            "Notes": _words(rng, rng.randint(0, 40)),
+            "Session Title (<100 characters)": _words(rng, rng.randint(3, 10)).title(),
+            "W Channel Text": rng.choice(CHANNELS),
+            "Description (<2500 characters)": _words(rng, rng.randint(60, 350)),
+            "Internal Notes": _words(rng, 800),
+            "Abstract Draft": _words(rng, 600),
+            "Last Modified": main.format_airtable_time(modified),
+        }
+        record = {"id": f"rec{i:014d}", "createdTime": "", "fields": fields}
+        records.append(record)
+        kwargs = main.record_to_slide_kwargs(record, None, status_names, {"hits": 0, "misses": 0})
+        state = main.render_slide_state(**{k: v for k, v in kwargs.items()
+                                           if k not in ("slide_object_id", "slide_id")})
+        if rng.random() < stale_fraction:
+            state["cells"][0] = "Old " + state["cells"][0]
+        deck_id = routes[fields["W Channel Text"]]["presentationId"] if routes else PRESENTATION_ID
+        deck_slides[deck_id].append(_slide(fields["Slide ID"], state))
+    return {
+        "tables": {main.SESSIONS_TABLE: records, main.CURATION_STATUS_TABLE: statuses, main.SPEAKERS_TABLE: people},
+        "presentations": {deck_id: {"presentationId": deck_id, "revisionId": "rev1", "slides": slides}
+                          for deck_id, slides in deck_slides.items()},
+        "routes": routes,
+    }
+
+
+# ================================================
+# Scenarios
+# ================================================
+@contextlib.contextmanager
+def patched_main(dataset: dict, workdir: str, error_rate: float = 0.0):
+    """Points main at fresh fakes for the dataset, a scratch state directory and no quota pacing."""
+    slides = FakeSlidesService(copy.deepcopy(dataset["presentations"]), error_rate=error_rate)
+    airtable = FakeAirtableApi(copy.deepcopy(dataset["tables"]))
+    overrides = {
+        "get_airtable_api": airtable,
+        "get_slides_service": lambda: slides,
+        "_shared_clients": {},
+        "_http_pools": {},
+        "HttpPool": FakeHttpPool,
+        "GOOGLE_PRESENTATION_ID": None if dataset["routes"] else PRESENTATION_ID,
+        "TEMPLATE_SLIDE_ID": TEMPLATE_SLIDE_ID,
+        "SYNC_STATE_DB": os.path.join(workdir, "sync_state.sqlite3"),
+        "PRESENTATION_CACHE_DIR": os.path.join(workdir, "presentation_cache"),
+        "CURATION_STATUS_CACHE_FILE": "",
+        "INITIAL_LOOKBACK_HOURS": 1,
+        "SLIDES_WRITE_LIMITER": main.RateLimiter(0),
+        "SLIDES_DECK_WRITES_PER_MINUTE": 0,
+        "_write_limiters": {},
+        "DECK_ROUTING_FIELD": "W Channel Text" if dataset["routes"] else "",
+        "DECK_ROUTES": json.dumps(dataset["routes"]) if dataset["routes"] else "",
+        "AIRTABLE_LIMITER": main.RateLimiter(0),
+        "RETRY_BASE_DELAY": 0.0,
+    }
+    saved = {name: getattr(main, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(main, name, value)
+    try:
+        yield slides, airtable
+    finally:
+        for name, value in saved.items():
+            setattr(main, name, value)
+
+
+def measure(fn) -> dict:
+    """Runs fn() and returns its wall time and peak traced memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"wallSeconds": round(wall, 4), "peakMemoryBytes": peak}
+
+
+def _result(scenario: str, size: int, timing: dict, slides: FakeSlidesService, airtable: FakeAirtableApi) -> dict:
+    return {
+        "scenario": scenario,
+        "sessions": size,
+        **timing,
+        "slidesGets": slides.stats["get"],
+        "slidesBatchUpdates": slides.stats["batchUpdate"],
+        "slidesRequests": slides.stats["requests"],
+        "slidesBytesSent": slides.stats["bytesSent"],
+        "slidesBytesReceived": slides.stats["bytesReceived"],
+        "airtableRequests": airtable.stats["requests"],
+        "airtableBytesReceived": airtable.stats["bytesReceived"],
+        "injectedErrors": slides.stats["errors"],
+        "phases": main.METRICS.summary()["phases"],
+    }
+
+
+def edit_sessions(airtable: FakeAirtableApi, fraction: float, seed: int = 0):
+    """Retitles a share of the sessions and marks them modified now, as organizers editing the base would."""
+    rng = random.Random(seed)
+    now = main.format_airtable_time(datetime.datetime.now(datetime.UTC))
+    for record in airtable.tables[main.SESSIONS_TABLE]:
+        if rng.random() < fraction:
+            record["fields"]["Session Title (<100 characters)"] += " (updated)"
+            record["fields"]["Last Modified"] = now
+
+
+def bench_main(dataset: dict, size: int, error_rate: float = 0.0) -> list:
+    """
+    A cold main() run over every recently modified session, an immediate warm
+    rerun, then runs after editing 10% of the sessions: with the deck cached
+    from the earlier runs, and after someone else edited the deck (a new
+    revision, so it is downloaded again).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, patched_main(dataset, workdir, error_rate) as (slides, airtable):
+        def run(scenario: str):
+            for stats in (slides.stats, airtable.stats):
+                stats.update({key: 0 for key in stats})
+            results.append(_result(scenario, size, measure(main.main), slides, airtable))
+
+        run("main (cold)")
+        run("main (warm)")
+        edit_sessions(airtable, 0.1, seed=1)
+        run("main (edits, cached deck)")
+        edit_sessions(airtable, 0.1, seed=2)
+        for deck in slides.decks.values():
+            deck["revisionId"] = f"rev{int(deck['revisionId'][3:]) + 1}"
+        run("main (edits, deck edited)")
+    return results
+
+
+def bench_idle(size: int, seed: int = 0) -> list:
+    """An incremental main() run with nothing modified since the watermark (the common hourly case)."""
+    dataset = generate_dataset(size, seed=seed, modified_fraction=0.0)
+    with tempfile.TemporaryDirectory() as workdir, patched_main(dataset, workdir) as (slides, airtable):
+        return [_result("main (no changes)", size, measure(main.main), slides, airtable)]
+
+
+def bench_paging(dataset: dict, size: int, pages: int = 4) -> list:
+    """
+    A full Sessions scan in `pages` pages where the second page fails once
+    with a 503. The retry has to fetch that page again and the scan has to
+    go on to the last page; a scan that stops early fails the benchmark.
+    """
+    with tempfile.TemporaryDirectory() as workdir, patched_main(dataset, workdir) as (slides, airtable):
+        saved, main.AIRTABLE_PAGE_SIZE = main.AIRTABLE_PAGE_SIZE, max(1, -(-size // pages))
+        airtable.fail_requests = {2}
+        seen = []
+        try:
+            table = airtable.table(main.AIRTABLE_BASE_ID, main.SESSIONS_TABLE)
+            timing = measure(lambda: seen.extend(record["id"] for page in main.iter_session_pages(table)
+                                                 for record in page))
+        finally:
+            main.AIRTABLE_PAGE_SIZE = saved
+        expected = [record["id"] for record in dataset["tables"][main.SESSIONS_TABLE]]
+        if seen != expected:
+            raise RuntimeError(f"Paging with a failed page returned {len(seen)} of {len(expected)} sessions.")
+        return [_result(f"airtable scan ({pages} pages, 503 on page 2)", size, timing, slides, airtable)]
+
+
+def bench_audit(dataset: dict, size: int) -> list:
+    """An audit of the whole deck (about 30% of slides stale), a repairing audit, then an audit of the clean deck."""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, patched_main(dataset, workdir) as (slides, airtable):
+        for scenario, repair in (("audit", False), ("audit --repair", True), ("audit (clean deck)", False)):
+            for stats in (slides.stats, airtable.stats):
+                stats.update({key: 0 for key in stats})
+            result = _result(scenario, size, measure(lambda: main.audit_deck(repair)), slides, airtable)
+            result["auditSlides"] = {series["labels"]["outcome"]: series["value"]
+                                     for series in main.METRICS.summary()["counters"].get("audit_slides", [])}
+            results.append(result)
+    return results
+
+
+def bench_sort(size: int, seed: int = 0, changed: int = 5) -> list:
+    """
+    `sort` of a deck whose slides are in creation order (not by time), then
+    a sync with SLIDE_ORDER_ON_SYNC after `changed` sessions moved to a new
+    time, which should move only those slides.
+    """
+    dataset = generate_dataset(size, seed=seed, modified_fraction=0.0)
+    rng = random.Random(seed)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, patched_main(dataset, workdir) as (slides, airtable):
+        def run(scenario: str, fn):
+            for stats in (slides.stats, airtable.stats):
+                stats.update({key: 0 for key in stats})
+            result = _result(scenario, size, measure(fn), slides, airtable)
+            result["slidesMoved"] = main.METRICS.counter("slide_moves", outcome="moved")
+            results.append(result)
+
+        run("sort (deck in creation order)", main.sort_slides)
+        now = main.format_airtable_time(datetime.datetime.now(datetime.UTC))
+        for record in rng.sample(airtable.tables[main.SESSIONS_TABLE], min(changed, size)):
+            record["fields"]["S25 Start Date/Time"] = f"2031-01-01 {rng.randint(0, 23):02d}:00"
+            record["fields"]["Last Modified"] = now
+        saved, main.SLIDE_ORDER_ON_SYNC = main.SLIDE_ORDER_ON_SYNC, True
+        try:
+            run(f"main ({changed} new times, ordered)", main.main)
+        finally:
+            main.SLIDE_ORDER_ON_SYNC = saved
+    return results
+
+
+STARTUP_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import main
+print(json.dumps({"importSeconds": time.perf_counter() - start,
+                  "heavyModules": [m for m in ("googleapiclient.discovery", "pyairtable") if m in sys.modules]}))
+"""
+
+
+def bench_startup(repeat: int = 5) -> list:
+    """Wall time of a fresh interpreter importing main (best of `repeat`), as every scheduled run pays it."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(main.__file__))).stdout
+        runs.append({"wallSeconds": round(time.perf_counter() - start, 4), **json.loads(output)})
+    best = min(runs, key=lambda run: run["wallSeconds"])
+    return [{"scenario": "startup (python + import main)", "sessions": "", **best,
+             "importSeconds": round(best["importSeconds"], 4)}]
+
+
+def bench_update(dataset: dict, size: int, sample: int = 100) -> list:
+    """update_presentation_with_slide over a sample of sessions, as main() calls it."""
+    records = dataset["tables"][main.SESSIONS_TABLE][:sample]
+    statuses = {s["id"]: s["fields"]["Status"] for s in dataset["tables"][main.CURATION_STATUS_TABLE]}
+
+    with tempfile.TemporaryDirectory() as workdir, patched_main(dataset, workdir) as (slides, airtable):
+        service = main.get_slides_service()
+
+        def run():
+            slide_index = main.fetch_presentation_index(service, PRESENTATION_ID)
+            for record in records:
+                kwargs = main.record_to_slide_kwargs(record, None, statuses, {"hits": 0, "misses": 0})
+                main.update_presentation_with_slide(service, PRESENTATION_ID, slide_index=slide_index, **kwargs)
+
+        return [_result(f"update_presentation_with_slide x{len(records)}", size, measure(run), slides, airtable)]
+
+
+def layout_with_helpers(names: list, statuses: list) -> dict:
+    """A people cell built the way record_to_slide_kwargs did before layout_people: format, join, rescan."""
+    text = ", ".join(main.adjust_representation(name) for name in names)
+    colors = ",".join(main.status_to_color_map.get(status.strip(), "unknown") for status in statuses)
+    return {"text": text, "runs": main.people_runs(text, colors)}
+
+
+def bench_people_layout(dataset: dict, size: int, passes: int = 5) -> list:
+    """
+    Micro-benchmark of the speakers/moderators cells of every session: the
+    old helpers against layout_people, whose per-person cache is cleared at
+    the start of each pass (one pass is one run). Also counts cells where the
+    two disagree.
+    """
+    cells = []
+    for record in dataset["tables"][main.SESSIONS_TABLE]:
+        fields = record["fields"]
+        cells.append((fields.get("Speaker Name & Title (from Speaker)", []), fields.get("S Status (from Speaker)", [])))
+        cells.append((fields.get("Moderator Name & Title", []), fields.get("S Status (from Moderator)", [])))
+    mismatches = sum(main.layout_people(*cell) != layout_with_helpers(*cell) for cell in cells)
+
+    def helpers():
+        for _ in range(passes):
+            for cell in cells:
+                layout_with_helpers(*cell)
+
+    def engine():
+        for _ in range(passes):
+            main.layout_person.cache_clear()
+            for cell in cells:
+                main.layout_people(*cell)
+
+    results = [{"scenario": f"people layout: helpers x{passes}", "sessions": size, **measure(helpers)}]
+    timing = measure(engine)
+    cache = main.layout_person.cache_info()
+    results.append({"scenario": f"people layout: layout_people x{passes}", "sessions": size, **timing,
+                    "cacheHits": cache.hits, "cacheMisses": cache.misses, "mismatches": mismatches})
+    return results
+
+
+def print_table(results: list):
+    columns = [
+        ("scenario", "scenario", 40), ("sessions", "sessions", 8), ("wallSeconds", "wall s", 9),
+        ("peakMemoryBytes", "peak MiB", 9), ("slidesGets", "gets", 5), ("slidesBatchUpdates", "writes", 7),
+        ("slidesRequests", "requests", 9), ("slidesBytesSent", "sent KiB", 9),
+        ("slidesBytesReceived", "recv KiB", 9), ("airtableRequests", "at reqs", 8),
+        ("airtableBytesReceived", "at KiB", 8), ("slidesMoved", "moved", 6),
+    ]
+    print(" ".join(f"{title:>{width}}" if key != "scenario" else f"{title:<{width}}" for key, title, width in columns))
+    for result in results:
+        cells = []
+        for key, _, width in columns:
+            value = result.get(key, "")
+            if value == "":
+                pass
+            elif key == "peakMemoryBytes":
+                value = f"{value / 2 ** 20:.1f}"
+            elif key.endswith("Bytes") or key.endswith("BytesSent") or key.endswith("BytesReceived"):
+                value = f"{value / 1024:.0f}"
+            cells.append(f"{value:<{width}}" if key == "scenario" else f"{value:>{width}}")
+        print(" ".join(cells))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the Airtable → Slides sync.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Numbers of sessions to generate.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Override SYNC_WORKERS.")
+    parser.add_argument("--batch", action="store_true", help="Enable SLIDES_BATCH_UPDATES.")
+    parser.add_argument("--decks", type=int, default=1, help="Spread the sessions over this many decks.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of Slides calls failing with 429.")
+    parser.add_argument("--json", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    if args.workers is not None:
+        main.SYNC_WORKERS = args.workers
+    if args.batch:
+        main.SLIDES_BATCH_UPDATES = True
+
+    results = bench_startup()
+    for size in args.sizes:
+        dataset = generate_dataset(size, seed=args.seed, decks=args.decks)
+        results.extend(bench_main(dataset, size, args.error_rate))
+        results.extend(bench_idle(size, seed=args.seed))
+        results.extend(bench_paging(dataset, size))
+        results.extend(bench_audit(dataset, size))
+        if args.decks <= 1:
+            results.extend(bench_sort(size, seed=args.seed))
+            results.extend(bench_update(dataset, size))
+        results.extend(bench_people_layout(dataset, size))
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
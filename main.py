@@ -1,12 +1,34 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import bisect
+import contextlib
+import copy
 import datetime
+import functools
+import hashlib
+import hmac
+import itertools
+import json
 import logging
 import os
+import queue
 import random
 import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
 
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from pyairtable import Api
+# The Google client and pyairtable are imported where they are first used:
+# a run with nothing to sync never pays for them.
+if TYPE_CHECKING:
+    from pyairtable import Api
 
 AIRTABLE_API_KEY = os.environ.get("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.environ.get("AIRTABLE_BASE_ID")
@@ -14,9 +36,133 @@ SESSIONS_TABLE = os.environ.get("SESSIONS_TABLE", "Sessions")
 CURATION_STATUS_TABLE = os.environ.get("CURATION_STATUS_TABLE", "Statuses")
 SPEAKERS_TABLE = os.environ.get("SPEAKERS_TABLE", "Speaker")
 
+# Sessions fields the sync renders; everything else (long text we never show)
+# is left out of the query.
+SESSION_FIELDS = [
+    "Slide ID",
+    "Curation Status",
+    "Speaker Name & Title (from Speaker)",
+    "Moderator Name & Title",
+    "S Status (from Speaker)",
+    "S Status (from Moderator)",
+    "S25 Start Date/Time",
+    "Notes",
+    "Session Title (<100 characters)",
+    "W Channel Text",
+    "Description (<2500 characters)",
+    # Linked Speaker records, for the speaker → sessions reverse index.
+    "Speaker",
+    "Moderator",
+]
+# Recently modified Speaker records re-render the colors of their sessions.
+SPEAKER_PROPAGATION = os.environ.get("SPEAKER_PROPAGATION", "1").lower() in ("1", "true", "yes")
+AIRTABLE_PAGE_SIZE = int(os.environ.get("AIRTABLE_PAGE_SIZE", "100"))
+
+# On-disk cache of the (small) curation status table; set the file to "" to disable.
+CURATION_STATUS_CACHE_FILE = os.environ.get("CURATION_STATUS_CACHE_FILE", ".curation_status_cache.json")
+CURATION_STATUS_CACHE_TTL = int(os.environ.get("CURATION_STATUS_CACHE_TTL", "3600"))
+
 GOOGLE_PRESENTATION_ID = os.environ.get("GOOGLE_PRESENTATION_ID")
 TEMPLATE_SLIDE_ID = os.environ.get("TEMPLATE_SLIDE_ID")
 GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get("GOOGLE_SERVICE_ACCOUNT_FILE")
+# Optional path to a saved Slides v1 discovery document. Without it the client
+# is built from the document bundled with google-api-python-client; either way
+# no discovery request is made.
+SLIDES_DISCOVERY_FILE = os.environ.get("SLIDES_DISCOVERY_FILE", "")
+
+# Multiple decks: sessions are routed to a presentation by the value of
+# DECK_ROUTING_FIELD (a Sessions field, e.g. "W Channel Text" or
+# "S25 Start Date/Time"). DECK_ROUTES is a JSON object mapping value prefixes
+# to a presentation id (using TEMPLATE_SLIDE_ID) or to
+# {"presentationId": ..., "templateSlideId": ...}; the longest matching prefix
+# wins and "" matches everything. GOOGLE_PRESENTATION_ID, when set, is the
+# default route. Without routes every session goes to GOOGLE_PRESENTATION_ID.
+DECK_ROUTING_FIELD = os.environ.get("DECK_ROUTING_FIELD", "")
+DECK_ROUTES = os.environ.get("DECK_ROUTES", "")
+if DECK_ROUTING_FIELD and DECK_ROUTING_FIELD not in SESSION_FIELDS:
+    # Fetch the routing field along with the rendered ones.
+    SESSION_FIELDS.append(DECK_ROUTING_FIELD)
+
+# Partial-response mask for the per-run presentation snapshot: only the parts
+# of the deck the sync reads (slide ids, backgrounds, table cells and notes pages).
+SLIDE_PAGE_FIELDS = (
+    "objectId,"
+    "pageProperties/pageBackgroundFill,"
+    "pageElements(objectId,table),"
+    "slideProperties/notesPage/pageElements(objectId,shape/text)"
+)
+PRESENTATION_FIELDS = f"revisionId,slides({SLIDE_PAGE_FIELDS})"
+
+# On-disk copy of each deck's snapshot, keyed by its revisionId: a run checks
+# the revision (a tiny request) and only downloads the deck again when someone
+# else edited it. Our own writes are applied to the copy and pinned with
+# writeControl.requiredRevisionId. "" disables the cache. Revision ids are
+# only guaranteed valid for a day, so a copy is refetched a day after its
+# revision was first seen (downloaded or written), however often it was
+# confirmed since.
+PRESENTATION_CACHE_DIR = os.environ.get("PRESENTATION_CACHE_DIR", ".presentation_cache")
+PRESENTATION_CACHE_MAX_AGE = int(os.environ.get("PRESENTATION_CACHE_MAX_AGE", "86400"))
+
+# Chronological slide order: `python main.py sort` (and, with
+# SLIDE_ORDER_ON_SYNC, every sync after its writes) moves session slides into
+# SLIDE_ORDER_FIELD order, moving as few slides as possible. Slides of other
+# kinds (the template, section dividers) are not moved, and session slides
+# are sorted only between them.
+SLIDE_ORDER_FIELD = os.environ.get("SLIDE_ORDER_FIELD", "S25 Start Date/Time")
+SLIDE_ORDER_ON_SYNC = os.environ.get("SLIDE_ORDER_ON_SYNC", "").lower() in ("1", "true", "yes")
+if SLIDE_ORDER_ON_SYNC and SLIDE_ORDER_FIELD not in SESSION_FIELDS:
+    SESSION_FIELDS.append(SLIDE_ORDER_FIELD)
+
+# Local sync state: the Last Modified high-water mark and a content hash per synced record.
+SYNC_STATE_DB = os.environ.get("SYNC_STATE_DB", "sync_state.sqlite3")
+# Lookback used when there is no watermark yet, and overlap re-read on every run
+# to tolerate clock skew (re-read records are skipped by their content hash).
+INITIAL_LOOKBACK_HOURS = float(os.environ.get("INITIAL_LOOKBACK_HOURS", "1"))
+WATERMARK_OVERLAP_SECONDS = int(os.environ.get("WATERMARK_OVERLAP_SECONDS", "60"))
+
+# Batch mode: coalesce the requests of many records into chunked batchUpdate calls.
+SLIDES_BATCH_UPDATES = os.environ.get("SLIDES_BATCH_UPDATES", "").lower() in ("1", "true", "yes")
+SLIDES_BATCH_MAX_REQUESTS = int(os.environ.get("SLIDES_BATCH_MAX_REQUESTS", "500"))
+SLIDES_BATCH_MAX_BYTES = int(os.environ.get("SLIDES_BATCH_MAX_BYTES", "1000000"))
+
+# Concurrency: worker threads per deck (sharing one Slides client) and the
+# quotas they share. Slides writes and Airtable calls are limited per process.
+SYNC_WORKERS = int(os.environ.get("SYNC_WORKERS", "1"))
+# Slides transport: a pool of keep-alive connections shared by all threads
+# (0: one per worker) and per-call timeouts in seconds; fetching the whole
+# deck gets a longer one than writes and single-page reads.
+SLIDES_HTTP_POOL_SIZE = int(os.environ.get("SLIDES_HTTP_POOL_SIZE", "0"))
+SLIDES_HTTP_TIMEOUT = float(os.environ.get("SLIDES_HTTP_TIMEOUT", "30"))
+SLIDES_SNAPSHOT_TIMEOUT = float(os.environ.get("SLIDES_SNAPSHOT_TIMEOUT", "120"))
+# Slides write quotas count per user per project, so every deck's writes
+# share one process-wide limit; a deck can be capped lower on its own.
+SLIDES_WRITES_PER_MINUTE = float(os.environ.get("SLIDES_WRITES_PER_MINUTE", "60"))
+SLIDES_DECK_WRITES_PER_MINUTE = float(os.environ.get("SLIDES_DECK_WRITES_PER_MINUTE", "0"))
+AIRTABLE_REQUESTS_PER_MINUTE = float(os.environ.get("AIRTABLE_REQUESTS_PER_MINUTE", "300"))
+
+# Retries for 429/5xx and connection errors: exponential backoff with full
+# jitter (or the server's Retry-After), capped by a per-run budget shared by
+# all workers so a quota storm does not turn into a retry stampede.
+RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.environ.get("RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY", "60"))
+RETRY_BUDGET = int(os.environ.get("RETRY_BUDGET", "100"))
+
+# Run metrics exports (empty disables): a JSON run summary and a Prometheus
+# textfile for the node_exporter textfile collector.
+METRICS_JSON_FILE = os.environ.get("METRICS_JSON_FILE", "")
+METRICS_PROM_FILE = os.environ.get("METRICS_PROM_FILE", "")
+
+# Daemon mode: where the webhook endpoint listens, how long a record must be
+# quiet before its slide is synced (bursts of edits collapse into one update)
+# and the longest a continuously edited record may wait. The MAC secret is the
+# base64 macSecretBase64 Airtable returns when the webhook is created; when
+# set, notifications without a valid X-Airtable-Content-MAC are rejected.
+DAEMON_HOST = os.environ.get("DAEMON_HOST", "0.0.0.0")
+DAEMON_PORT = int(os.environ.get("DAEMON_PORT", "8080"))
+DEBOUNCE_SECONDS = float(os.environ.get("DEBOUNCE_SECONDS", "3"))
+DEBOUNCE_MAX_SECONDS = float(os.environ.get("DEBOUNCE_MAX_SECONDS", "30"))
+AIRTABLE_WEBHOOK_MAC_SECRET = os.environ.get("AIRTABLE_WEBHOOK_MAC_SECRET", "")
 
 # Google API scopes
 SCOPES = [
@@ -66,13 +212,817 @@ status_to_color_map = {
 }
 
 
+# ================================================
+# Helper: Run metrics (phase timers, counters, histograms)
+# ================================================
+HISTOGRAM_BUCKETS = {
+    "batch_update_bytes": [1024, 4096, 16384, 65536, 262144, 1048576, 4194304],
+    "batch_update_requests": [1, 5, 10, 25, 50, 100, 250, 500],
+}
+
+
+class Metrics:
+    """
+    Thread-safe per-run metrics: cumulative time per phase, labelled counters
+    and fixed-bucket histograms, exportable as JSON or Prometheus text.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.phases = {}
+            self.counters = {}
+            self.histograms = {}
+
+    @contextlib.contextmanager
+    def timed(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                total = self.phases.setdefault(phase, {"seconds": 0.0, "count": 0})
+                total["seconds"] += elapsed
+                total["count"] += 1
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def counter(self, name: str, **labels) -> float:
+        with self.lock:
+            return self.counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def counter_by_label(self, name: str, label: str) -> dict:
+        with self.lock:
+            return {dict(key).get(label): value for key, value in self.counters.get(name, {}).items()}
+
+    def observe(self, name: str, value: float):
+        buckets = HISTOGRAM_BUCKETS[name]
+        with self.lock:
+            histogram = self.histograms.setdefault(name, {"buckets": [0] * len(buckets), "sum": 0, "count": 0})
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "startedAt": self.started,
+                "durationSeconds": round(time.time() - self.started, 3),
+                "phases": {phase: {"seconds": round(total["seconds"], 4), "count": total["count"]}
+                           for phase, total in self.phases.items()},
+                "counters": {name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                             for name, series in self.counters.items()},
+                "histograms": {name: {"buckets": dict(zip(map(str, HISTOGRAM_BUCKETS[name]), h["buckets"])),
+                                      "sum": h["sum"], "count": h["count"]}
+                               for name, h in self.histograms.items()},
+            }
+
+    def to_prometheus(self, prefix: str = "slides_sync") -> str:
+        def labels_text(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+        lines = []
+        with self.lock:
+            lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+            lines.append(f"{prefix}_last_run_timestamp_seconds {self.started}")
+            lines.append(f"# TYPE {prefix}_run_duration_seconds gauge")
+            lines.append(f"{prefix}_run_duration_seconds {time.time() - self.started}")
+            lines.append(f"# TYPE {prefix}_phase_seconds gauge")
+            for phase, total in sorted(self.phases.items()):
+                lines.append(f'{prefix}_phase_seconds{{phase="{phase}"}} {total["seconds"]}')
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{prefix}_{name}_total{labels_text(key)} {value}")
+            for name, h in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                for bound, count in zip(HISTOGRAM_BUCKETS[name], h["buckets"]):
+                    lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+                lines.append(f'{prefix}_{name}_bucket{{le="+Inf"}} {h["count"]}')
+                lines.append(f"{prefix}_{name}_sum {h['sum']}")
+                lines.append(f"{prefix}_{name}_count {h['count']}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def export_metrics(json_path: str = None, prom_path: str = None):
+    """Writes the run summary and Prometheus textfile, when configured."""
+    json_path = METRICS_JSON_FILE if json_path is None else json_path
+    prom_path = METRICS_PROM_FILE if prom_path is None else prom_path
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(METRICS.summary(), f, indent=2)
+    if prom_path:
+        # Write then rename, so the textfile collector never reads a partial file.
+        with open(prom_path + ".tmp", "w") as f:
+            f.write(METRICS.to_prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+
+
+# ================================================
+# Helper: Rate limiting (token bucket shared by all workers)
+# ================================================
+class RateLimiter:
+    """
+    Token bucket allowing per_minute calls per minute across all threads,
+    with bursts of up to `burst` calls. A non-positive rate disables it.
+    """
+
+    def __init__(self, per_minute: float, burst: float = 1):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class LimiterChain:
+    """Acquires each limiter in turn, for calls counted against several quotas."""
+
+    def __init__(self, *limiters: RateLimiter):
+        self.limiters = limiters
+
+    def acquire(self):
+        for limiter in self.limiters:
+            limiter.acquire()
+
+
+SLIDES_WRITE_LIMITER = RateLimiter(SLIDES_WRITES_PER_MINUTE)
+AIRTABLE_LIMITER = RateLimiter(AIRTABLE_REQUESTS_PER_MINUTE)
+_write_limiters = {}
+_write_limiters_lock = threading.Lock()
+
+
+def write_limiter(presentation_id: str) -> LimiterChain:
+    """
+    The Slides write limiters of a deck: its own cap, then the process-wide
+    quota every deck shares (waiting on the deck first, so a deck at its cap
+    does not hold up the others).
+    """
+    with _write_limiters_lock:
+        if presentation_id not in _write_limiters:
+            _write_limiters[presentation_id] = LimiterChain(
+                RateLimiter(SLIDES_DECK_WRITES_PER_MINUTE), SLIDES_WRITE_LIMITER)
+        return _write_limiters[presentation_id]
+
+
+# ================================================
+# Helper: Retry with backoff
+# ================================================
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_retry_lock = threading.Lock()
+_retry_state = {"budget": RETRY_BUDGET}
+
+
+def reset_retry_state(budget: int = None):
+    with _retry_lock:
+        _retry_state["budget"] = RETRY_BUDGET if budget is None else budget
+
+
+def retry_counts() -> dict:
+    return METRICS.counter_by_label("retries", "endpoint")
+
+
+def _error_status(e: Exception):
+    """HTTP status of a googleapiclient HttpError or a requests HTTPError (pyairtable)."""
+    resp = getattr(e, "resp", None)
+    if resp is not None and getattr(resp, "status", None) is not None:
+        return int(resp.status)
+    response = getattr(e, "response", None)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return int(response.status_code)
+    return None
+
+
+def _retry_after(e: Exception):
+    headers = getattr(e, "resp", None)
+    if headers is None and getattr(e, "response", None) is not None:
+        headers = e.response.headers
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# Connection errors of the client libraries that do not derive from the
+# builtin ConnectionError/TimeoutError, as (module, class). They are looked up
+# in sys.modules rather than imported: an error can only come from a library
+# that is loaded, and importing it here would slow every cold start.
+TRANSPORT_ERRORS = (
+    ("requests.exceptions", "ConnectionError"),  # pyairtable; includes ConnectTimeout
+    ("requests.exceptions", "Timeout"),  # includes ReadTimeout
+    ("requests.exceptions", "ChunkedEncodingError"),
+    ("httplib2", "ServerNotFoundError"),  # Slides: DNS lookup failed
+    ("google.auth.exceptions", "TransportError"),  # token refresh could not connect
+)
+
+
+def _is_transport_error(e: Exception) -> bool:
+    for module_name, class_name in TRANSPORT_ERRORS:
+        error_class = getattr(sys.modules.get(module_name), class_name, None)
+        if error_class is not None and isinstance(e, error_class):
+            return True
+    return False
+
+
+def is_retryable(e: Exception) -> bool:
+    status = _error_status(e)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(e, (ConnectionError, TimeoutError)) or _is_transport_error(e)
+
+
+def call_with_retry(endpoint: str, fn, limiter: RateLimiter = None):
+    """
+    Calls fn() (after acquiring the limiter, on every attempt) and retries
+    retryable errors with exponential backoff and full jitter, honoring
+    Retry-After up to RETRY_MAX_DELAY. Each retry is counted against `endpoint` and spends one unit
+    of the shared retry budget; once the budget is gone errors are raised.
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        METRICS.incr("api_calls", endpoint=endpoint)
+        try:
+            return fn()
+        except Exception as e:
+            attempt += 1
+            if not is_retryable(e) or attempt >= RETRY_MAX_ATTEMPTS:
+                raise
+            with _retry_lock:
+                if _retry_state["budget"] <= 0:
+                    logging.warning(f"Retry budget exhausted; not retrying {endpoint}: {e}")
+                    raise
+                _retry_state["budget"] -= 1
+            METRICS.incr("retries", endpoint=endpoint)
+            delay = _retry_after(e)
+            if delay is None:
+                delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+            else:
+                # A caller may hold a deck's write lock while it waits.
+                delay = min(max(delay, 0.0), RETRY_MAX_DELAY)
+            logging.warning(f"{endpoint} failed ({e}); retry {attempt} in {delay:.1f}s.")
+            time.sleep(delay)
+
+
 # ================================================
 # Helper: Google Slides Service
 # ================================================
+@functools.lru_cache(maxsize=None)
+def get_credentials():
+    """Service account credentials, parsed once per process and shared by every client."""
+    from google.oauth2.service_account import Credentials
+    return Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+
+
+@functools.lru_cache(maxsize=None)
+def load_slides_discovery_doc():
+    """The Slides v1 discovery document (SLIDES_DISCOVERY_FILE or the bundled copy), read once per process."""
+    if SLIDES_DISCOVERY_FILE:
+        with open(SLIDES_DISCOVERY_FILE) as f:
+            return f.read()
+    from googleapiclient.discovery_cache import get_static_doc
+    return get_static_doc("slides", "v1")
+
+
 def get_slides_service():
-    creds = Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-    service = build('slides', 'v1', credentials=creds)
-    return service
+    from googleapiclient.discovery import build, build_from_document
+    with METRICS.timed("client_setup"):
+        creds = get_credentials()
+        discovery_doc = load_slides_discovery_doc()
+        if discovery_doc is None:
+            # Older client libraries ship no documents; fetch it without the file cache.
+            return build('slides', 'v1', credentials=creds, cache_discovery=False)
+        return build_from_document(discovery_doc, credentials=creds)
+
+
+def get_airtable_api() -> Api:
+    from pyairtable import Api
+    return Api(AIRTABLE_API_KEY)
+
+
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_slides_service():
+    """
+    Returns the process-wide Slides client. Requests can be built on it from
+    any thread; they are executed with execute_slides on pooled connections,
+    since a single httplib2 connection is not thread-safe.
+    """
+    with _shared_clients_lock:
+        if _shared_clients.get("slides") is None:
+            _shared_clients["slides"] = get_slides_service()
+        return _shared_clients["slides"]
+
+
+class HttpPool:
+    """
+    Bounded pool of authorized keep-alive httplib2 connections with one
+    timeout, safe to share across threads. Idle connections are reused most
+    recently used first, so the sync keeps a few warm TLS connections instead
+    of opening new ones.
+    """
+
+    def __init__(self, size: int, timeout: float):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import google_auth_httplib2
+        import httplib2
+        return google_auth_httplib2.AuthorizedHttp(get_credentials(), http=httplib2.Http(timeout=self.timeout))
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Checks out an idle connection (opening one while below the pool size, else waiting for one)."""
+        try:
+            http = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if not create:
+                http = self._idle.get()
+            else:
+                try:
+                    http = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+        try:
+            yield http
+        finally:
+            self._idle.put(http)
+
+
+_http_pools = {}
+_http_pools_lock = threading.Lock()
+
+
+def get_http_pool(timeout: float) -> HttpPool:
+    """The connection pool for a timeout (pools are created on first use, one per distinct timeout)."""
+    with _http_pools_lock:
+        if timeout not in _http_pools:
+            size = SLIDES_HTTP_POOL_SIZE or max(1, SYNC_WORKERS) * len(load_deck_routes())
+            _http_pools[timeout] = HttpPool(size, timeout)
+        return _http_pools[timeout]
+
+
+def execute_slides(request, timeout: float = None):
+    """Executes a Slides API request on a pooled connection with the given timeout (default SLIDES_HTTP_TIMEOUT)."""
+    with get_http_pool(timeout or SLIDES_HTTP_TIMEOUT).connection() as http:
+        return request.execute(http=http)
+
+
+# ================================================
+# Helper: Presentation snapshot (fetched once per run)
+# ================================================
+def build_slide_index(presentation: dict) -> dict:
+    """
+    Indexes a presentation by slide objectId. Each entry holds:
+      - slide: the slide page,
+      - table: the first table page element (or None),
+      - notes: the speaker notes page element (or None),
+      - notesId: the objectId of the speaker notes element (or None).
+    """
+    index = {}
+    for page in presentation.get("slides", []):
+        table_element = next((pe for pe in page.get("pageElements", []) if "table" in pe), None)
+        notes_elements = page.get("slideProperties", {}).get("notesPage", {}).get("pageElements", [])
+        notes_element = notes_elements[1] if len(notes_elements) > 1 else None
+        index[page.get("objectId")] = {
+            "slide": page,
+            "table": table_element,
+            "notes": notes_element,
+            "notesId": notes_element["objectId"] if notes_element else None,
+        }
+    return index
+
+
+def fetch_presentation(service, presentation_id: str) -> dict:
+    """Downloads the parts of a deck the sync reads (PRESENTATION_FIELDS), with its revisionId."""
+    with METRICS.timed("slide_lookup"):
+        presentation = call_with_retry("slides.presentations.get", lambda: execute_slides(
+            service.presentations().get(presentationId=presentation_id, fields=PRESENTATION_FIELDS),
+            SLIDES_SNAPSHOT_TIMEOUT))
+    logging.info(f"Fetched presentation snapshot with {len(presentation.get('slides', []))} slide(s).")
+    return presentation
+
+
+def fetch_presentation_index(service, presentation_id: str) -> dict:
+    return build_slide_index(fetch_presentation(service, presentation_id))
+
+
+def fetch_presentation_revision(service, presentation_id: str) -> str:
+    """The deck's current revisionId (a few bytes instead of the whole deck)."""
+    with METRICS.timed("slide_lookup"):
+        presentation = call_with_retry("slides.presentations.get", lambda: execute_slides(
+            service.presentations().get(presentationId=presentation_id, fields="revisionId")))
+    return presentation.get("revisionId")
+
+
+# ================================================
+# Helper: Presentation cache (keyed by revisionId)
+# ================================================
+class DeckChangedError(Exception):
+    """Someone else edited the deck since the snapshot the requests were built on."""
+
+
+def is_revision_mismatch(e: Exception) -> bool:
+    """True for the 400 a batchUpdate gets when writeControl.requiredRevisionId is no longer current."""
+    return _error_status(e) == 400 and "revision" in str(e).lower()
+
+
+def _presentation_cache_path(presentation_id: str) -> str:
+    return os.path.join(PRESENTATION_CACHE_DIR, f"{presentation_id}.json")
+
+
+def load_cached_presentation(presentation_id: str):
+    """
+    Returns the cached {revisionId, revisionSeenAt, slides} of a deck, or
+    None when there is none or its revision was first seen too long ago to
+    still be usable.
+    """
+    if not PRESENTATION_CACHE_DIR:
+        return None
+    try:
+        with open(_presentation_cache_path(presentation_id)) as f:
+            cached = json.load(f)
+        if cached["revisionId"] and revision_is_fresh(cached["revisionSeenAt"]):
+            return cached
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def revision_is_fresh(seen_at: float) -> bool:
+    """True while a revision first seen at seen_at (epoch seconds) can still be sent as requiredRevisionId."""
+    return seen_at is not None and 0 <= time.time() - seen_at < PRESENTATION_CACHE_MAX_AGE
+
+
+def save_cached_presentation(presentation_id: str, revision_id: str, revision_seen_at: float, slide_index: dict):
+    if not PRESENTATION_CACHE_DIR:
+        return
+    path = _presentation_cache_path(presentation_id)
+    try:
+        os.makedirs(PRESENTATION_CACHE_DIR, exist_ok=True)
+        # Write then rename, so a crash never leaves a torn cache behind. One
+        # dumps() string uses the C encoder; json.dump() streams in Python.
+        with open(path + ".tmp", "w") as f:
+            f.write(json.dumps({"revisionId": revision_id, "revisionSeenAt": revision_seen_at,
+                                "slides": [entry["slide"] for entry in slide_index.values()]}))
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logging.warning(f"Could not write presentation cache for {presentation_id}: {e}")
+
+
+def drop_cached_presentation(presentation_id: str):
+    if PRESENTATION_CACHE_DIR:
+        with contextlib.suppress(OSError):
+            os.remove(_presentation_cache_path(presentation_id))
+
+
+def index_object_ids(slide_index: dict) -> dict:
+    """Maps the object ids our requests address (slides, tables, notes) to their slide id."""
+    objects = {}
+    for slide_id, entry in slide_index.items():
+        objects[slide_id] = slide_id
+        if entry["table"]:
+            objects[entry["table"]["objectId"]] = slide_id
+        if entry["notesId"]:
+            objects[entry["notesId"]] = slide_id
+    return objects
+
+
+def _text_model(text_content: dict) -> tuple:
+    """Returns (text, per-character background rgb or None) of a cell or shape, ending in a newline."""
+    text, colors = "", []
+    for te in text_content.get("textElements", []):
+        run = te.get("textRun")
+        if not run:
+            continue
+        rgb = run.get("style", {}).get("backgroundColor", {}).get("opaqueColor", {}).get("rgbColor")
+        text += run["content"]
+        colors.extend([rgb] * len(run["content"]))
+    if not text.endswith("\n"):
+        text += "\n"
+        colors.append(None)
+    return text, colors
+
+
+def _set_text_model(text_content: dict, text: str, colors: list):
+    """Stores a text model back as textElements (one run per paragraph and color)."""
+    elements, start = [], 0
+    for i in range(1, len(text) + 1):
+        if i == len(text) or colors[i] != colors[start] or text[i - 1] == "\n":
+            style = {"backgroundColor": {"opaqueColor": {"rgbColor": colors[start]}}} if colors[start] else {}
+            element = {"endIndex": i, "textRun": {"content": text[start:i], "style": style}}
+            if start:
+                element["startIndex"] = start
+            elements.append(element)
+            start = i
+    text_content["textElements"] = elements
+
+
+def apply_local_requests(slide_index: dict, objects: dict, requests_list: list):
+    """
+    Applies requests the API has just accepted to a deck's slide index (and
+    its object id map) the way the API applied them, so the index stays equal
+    to the deck without downloading it again. Handles the requests
+    build_slide_requests sends; anything else raises ValueError.
+
+    The text model covers text and background colors only. Text inserted into
+    a cell is given the color before it, and the real API may do otherwise;
+    that never reaches a sync decision, because a people cell whose text
+    changed is always cleared and recolored over its whole range. `audit`
+    compares the real deck with Airtable when in doubt.
+    """
+    for request in requests_list:
+        kind, params = next(iter(request.items()))
+        if kind == "duplicateObject":
+            source_id = objects[params["objectId"]]
+            id_map = params.get("objectIds", {})
+            page = copy.deepcopy(slide_index[source_id]["slide"])
+            entry = build_slide_index({"slides": [page]})[source_id]
+            required = [source_id, entry["table"] and entry["table"]["objectId"], entry["notesId"]]
+            if not all(object_id in id_map for object_id in required):
+                raise ValueError("duplicateObject without ids for the slide, table and notes")
+            notes_elements = page.get("slideProperties", {}).get("notesPage", {}).get("pageElements", [])
+            for element in [page] + page.get("pageElements", []) + notes_elements:
+                element["objectId"] = id_map.get(element["objectId"], element["objectId"])
+            # The copy lands right after the original.
+            entries = list(slide_index.items())
+            position = next(i for i, (slide_id, _) in enumerate(entries) if slide_id == source_id) + 1
+            entries[position:position] = build_slide_index({"slides": [page]}).items()
+            slide_index.clear()
+            slide_index.update(entries)
+            objects.update(index_object_ids({page["objectId"]: slide_index[page["objectId"]]}))
+        elif kind == "updateSlidesPosition":
+            order = move_slides(list(slide_index), params["slideObjectIds"], params.get("insertionIndex", 0))
+            entries = [(slide_id, slide_index[slide_id]) for slide_id in order]
+            slide_index.clear()
+            slide_index.update(entries)
+        elif kind == "updatePageProperties":
+            slide = slide_index[objects[params["objectId"]]]["slide"]
+            slide.setdefault("pageProperties", {}).update(copy.deepcopy(params["pageProperties"]))
+        elif kind in ("insertText", "deleteText", "updateTextStyle"):
+            entry = slide_index[objects[params["objectId"]]]
+            if "cellLocation" in params:
+                location = params["cellLocation"]
+                cell = entry["table"]["table"]["tableRows"][location["rowIndex"]]["tableCells"][location["columnIndex"]]
+                text_content = cell.setdefault("text", {})
+            else:
+                text_content = entry["notes"].setdefault("shape", {}).setdefault("text", {})
+            text, colors = _text_model(text_content)
+            if kind == "insertText":
+                index = params.get("insertionIndex", 0)
+                inherited = colors[index - 1] if index else None
+                text = text[:index] + params["text"] + text[index:]
+                colors = colors[:index] + [inherited] * len(params["text"]) + colors[index:]
+            elif kind == "deleteText":
+                text, colors = "\n", [None]
+            else:
+                text_range = params["textRange"]
+                start, end = ((0, len(text)) if text_range["type"] == "ALL"
+                              else (text_range["startIndex"], text_range["endIndex"]))
+                rgb = params["style"].get("backgroundColor", {}).get("opaqueColor", {}).get("rgbColor")
+                colors[start:end] = [rgb] * (end - start)
+            _set_text_model(text_content, text, colors)
+        else:
+            raise ValueError(f"cannot apply {kind} locally")
+
+
+# ================================================
+# Helper: Decks (sessions routed to several presentations)
+# ================================================
+def load_deck_routes() -> dict:
+    """
+    Parses DECK_ROUTES into {value prefix: (presentation id, template slide id)},
+    with GOOGLE_PRESENTATION_ID as the "" (default) route unless one is given
+    (without DECK_ROUTES that is the only route).
+    """
+    routes = {}
+    for prefix, route in (json.loads(DECK_ROUTES) if DECK_ROUTES else {}).items():
+        if isinstance(route, str):
+            routes[prefix] = (route, TEMPLATE_SLIDE_ID)
+        else:
+            routes[prefix] = (route["presentationId"], route.get("templateSlideId", TEMPLATE_SLIDE_ID))
+    if "" not in routes and (GOOGLE_PRESENTATION_ID or not routes):
+        routes[""] = (GOOGLE_PRESENTATION_ID, TEMPLATE_SLIDE_ID)
+    return routes
+
+
+class Decks:
+    """
+    The decks of a run: routes Sessions records to presentations and keeps a
+    separate slide index per deck, loaded the first time a record needs it
+    (decks with nothing to sync are never read). An index comes from the
+    on-disk cache when the deck's revision still matches, and is kept in step
+    with our own writes, which are pinned to that revision.
+    """
+
+    def __init__(self, service, use_cache: bool = True):
+        self.service = service
+        self.use_cache = use_cache
+        self.routes = load_deck_routes()
+        self._decks = {}
+        self._lock = threading.Lock()
+
+    def route(self, record: dict) -> dict:
+        """The deck for a record: the route whose prefix is the longest match of its routing field."""
+        value = record.get("fields", {}).get(DECK_ROUTING_FIELD, "") if DECK_ROUTING_FIELD else ""
+        if isinstance(value, list):
+            value = value[0] if value else ""
+        value = str(value or "")
+        prefix = max((p for p in self.routes if value.startswith(p)), key=len, default=None)
+        if prefix is None:
+            raise Exception(f"No deck route matches {DECK_ROUTING_FIELD} = {value!r}.")
+        return self.deck(*self.routes[prefix])
+
+    def deck(self, presentation_id: str, template_slide_id: str = None) -> dict:
+        with self._lock:
+            if presentation_id not in self._decks:
+                self._decks[presentation_id] = {
+                    "presentationId": presentation_id,
+                    "templateSlideId": template_slide_id or TEMPLATE_SLIDE_ID,
+                    "index": None,
+                    "objects": None,
+                    "revisionId": None,
+                    "revisionSeenAt": None,
+                    "cacheable": True,
+                    "dirty": False,
+                    "lock": threading.Lock(),
+                    "writeLock": threading.Lock(),
+                }
+            return self._decks[presentation_id]
+
+    def index(self, presentation_id: str) -> dict:
+        """The deck's slide index; other decks load in parallel."""
+        deck = self.deck(presentation_id)
+        with deck["lock"]:
+            if deck["index"] is None:
+                self._load(deck)
+            return deck["index"]
+
+    def _load(self, deck: dict):
+        presentation_id = deck["presentationId"]
+        cached = load_cached_presentation(presentation_id) if self.use_cache else None
+        presentation = None
+        if cached is not None:
+            if fetch_presentation_revision(self.service, presentation_id) == cached["revisionId"]:
+                presentation = cached
+                METRICS.incr("presentation_cache", outcome="hit")
+                logging.info(f"Presentation {presentation_id} unchanged since revision {cached['revisionId']}; "
+                             f"using the cached snapshot.")
+            else:
+                METRICS.incr("presentation_cache", outcome="stale")
+        else:
+            METRICS.incr("presentation_cache", outcome="miss")
+        if presentation is None:
+            presentation = fetch_presentation(self.service, presentation_id)
+        deck["index"] = build_slide_index(presentation)
+        deck["objects"] = index_object_ids(deck["index"])
+        deck["revisionId"] = presentation.get("revisionId")
+        deck["revisionSeenAt"] = cached["revisionSeenAt"] if presentation is cached else time.time()
+        deck["cacheable"] = True
+        deck["dirty"] = presentation is not cached
+
+    def pin(self, presentation_id: str, revision_id: str) -> dict:
+        """
+        Starts a deck at a known revision without reading it (to apply a plan
+        built on that revision) and returns the slide index to pass to
+        write(): the cached copy if it is at that revision, otherwise an empty
+        stand-in (writes are then not applied to a copy).
+        """
+        deck = self.deck(presentation_id)
+        cached = load_cached_presentation(presentation_id) if self.use_cache else None
+        with deck["lock"]:
+            if cached is not None and cached["revisionId"] == revision_id:
+                deck["index"] = build_slide_index(cached)
+                deck["objects"] = index_object_ids(deck["index"])
+                deck["revisionSeenAt"] = cached["revisionSeenAt"]
+                deck["cacheable"] = True
+            else:
+                deck["index"], deck["objects"] = {}, None
+                deck["revisionSeenAt"] = None
+                deck["cacheable"] = False
+            deck["revisionId"] = revision_id
+            deck["dirty"] = False
+            return deck["index"]
+
+    def write(self, presentation_id: str, requests_list: list, slide_index: dict) -> dict:
+        """
+        Sends requests built on slide_index, pinned to the revision that index
+        reflects, and applies them to it. Writes to a deck are serialized so
+        each one can name the revision left by the one before; the lock is
+        held through retries, so a write backing off after a 429 holds up the
+        deck's other writers for up to RETRY_MAX_DELAY per retry. Raises
+        DeckChangedError, and drops the index and its cache, when someone else
+        has edited the deck since.
+        """
+        deck = self.deck(presentation_id)
+        with deck["writeLock"]:
+            if deck["index"] is not slide_index:
+                raise DeckChangedError(f"Presentation {presentation_id} was reloaded after these requests were built.")
+            try:
+                response = send_batch_update(self.service, presentation_id, requests_list, deck["revisionId"])
+            except Exception as e:
+                if not is_revision_mismatch(e):
+                    raise
+                self.invalidate(presentation_id)
+                raise DeckChangedError(f"Presentation {presentation_id} was edited by someone else; "
+                                       f"it is reloaded for the next records.") from e
+            deck["revisionId"] = response.get("writeControl", {}).get("requiredRevisionId")
+            deck["revisionSeenAt"] = time.time()
+            if deck["cacheable"]:
+                deck["dirty"] = True
+                try:
+                    apply_local_requests(slide_index, deck["objects"], requests_list)
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    # The write went through; only the cached copy can no longer be trusted.
+                    logging.warning(f"Not caching presentation {presentation_id}: {e}")
+                    deck["cacheable"] = False
+                    drop_cached_presentation(presentation_id)
+            return response
+
+    def validate(self, presentation_id: str):
+        """
+        Drops a loaded index if someone else has edited the deck since (one
+        small read), or if its revision was first seen too long ago to send.
+        """
+        deck = self.deck(presentation_id)
+        with deck["writeLock"]:
+            if deck["index"] is None or not deck["revisionId"]:
+                return
+            if not revision_is_fresh(deck["revisionSeenAt"]):
+                METRICS.incr("presentation_cache", outcome="expired")
+                self.invalidate(presentation_id)
+            elif fetch_presentation_revision(self.service, presentation_id) != deck["revisionId"]:
+                METRICS.incr("presentation_cache", outcome="stale")
+                self.invalidate(presentation_id)
+
+    def invalidate(self, presentation_id: str):
+        deck = self.deck(presentation_id)
+        with deck["lock"]:
+            deck["index"] = None
+            deck["revisionId"] = None
+            deck["revisionSeenAt"] = None
+        drop_cached_presentation(presentation_id)
+
+    def save(self):
+        """Writes the decks changed or downloaded this run to the on-disk cache."""
+        with self._lock:
+            decks = list(self._decks.values())
+        for deck in decks:
+            with deck["writeLock"]:
+                if deck["dirty"] and deck["cacheable"] and deck["index"] is not None and deck["revisionId"]:
+                    save_cached_presentation(deck["presentationId"], deck["revisionId"], deck["revisionSeenAt"],
+                                             deck["index"])
+                    deck["dirty"] = False
+
+    def loaded(self) -> list:
+        """The decks whose index has been loaded."""
+        with self._lock:
+            return [deck for deck in self._decks.values() if deck["index"] is not None]
 
 
 # ================================================
@@ -81,10 +1031,199 @@ def get_slides_service():
 # ================================================
 def get_airtable_record_column_value(base_id: str, api: Api, table_name: str, record_id: str, column_with_name: str):
     table = api.table(base_id, table_name)
-    record = table.get(record_id)
+    record = call_with_retry("airtable.get", lambda: table.get(record_id), AIRTABLE_LIMITER)
     return record.get("fields", {}).get(column_with_name)
 
 
+# ================================================
+# Helper: Curation status lookup (one bulk read per run)
+# ================================================
+def load_curation_statuses(base_id: str, api: Api, table_name: str, column_with_name: str = "Status") -> dict:
+    """
+    Returns a {record_id: status name} mapping for the whole status table,
+    read from the on-disk cache when it is younger than the TTL and otherwise
+    fetched with a single all() call.
+    """
+    if CURATION_STATUS_CACHE_FILE:
+        try:
+            with open(CURATION_STATUS_CACHE_FILE) as f:
+                cached = json.load(f)
+            age = time.time() - cached["fetchedAt"]
+            if cached.get("table") == table_name and 0 <= age < CURATION_STATUS_CACHE_TTL:
+                logging.info(f"Loaded {len(cached['statuses'])} curation status(es) from cache ({int(age)}s old).")
+                return cached["statuses"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    table = api.table(base_id, table_name)
+    records = call_with_retry("airtable.all", lambda: table.all(fields=[column_with_name]), AIRTABLE_LIMITER)
+    statuses = {record["id"]: record.get("fields", {}).get(column_with_name) for record in records}
+    logging.info(f"Fetched {len(statuses)} curation status(es) from Airtable.")
+
+    if CURATION_STATUS_CACHE_FILE:
+        try:
+            with open(CURATION_STATUS_CACHE_FILE, "w") as f:
+                json.dump({"table": table_name, "fetchedAt": time.time(), "statuses": statuses}, f)
+        except OSError as e:
+            logging.warning(f"Could not write curation status cache: {e}")
+    return statuses
+
+
+def resolve_curation_status(base_id: str, api: Api, table_name: str, record_id: str,
+                            statuses: dict, stats: dict, column_with_name: str = "Status"):
+    """
+    Looks a linked status record up in the prefetched mapping, falling back to
+    a single GET (and remembering the result) for ids added since the prefetch.
+    """
+    if record_id in statuses:
+        stats["hits"] += 1
+        METRICS.incr("status_cache_lookups", result="hit")
+        return statuses[record_id]
+    stats["misses"] += 1
+    METRICS.incr("status_cache_lookups", result="miss")
+    with METRICS.timed("status_resolution"):
+        value = get_airtable_record_column_value(base_id, api, table_name, record_id, column_with_name)
+    statuses[record_id] = value
+    return value
+
+
+# ================================================
+# Helper: Sync state store (SQLite)
+# ================================================
+def open_sync_state(path: str = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path or SYNC_STATE_DB)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS synced_records (
+            record_id TEXT PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            synced_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS dead_letters (
+            record_id TEXT PRIMARY KEY,
+            error TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            failed_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS speaker_sessions (
+            speaker_id TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            PRIMARY KEY (speaker_id, session_id)
+        );
+        CREATE INDEX IF NOT EXISTS speaker_sessions_by_session ON speaker_sessions (session_id);
+        CREATE TABLE IF NOT EXISTS slide_order (
+            record_id TEXT PRIMARY KEY,
+            slide_id TEXT NOT NULL,
+            sort_value TEXT NOT NULL
+        );
+    """)
+    return conn
+
+
+def get_state_value(conn: sqlite3.Connection, key: str):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_state_value(conn: sqlite3.Connection, key: str, value: str):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def get_synced_hash(conn: sqlite3.Connection, record_id: str):
+    row = conn.execute("SELECT content_hash FROM synced_records WHERE record_id = ?", (record_id,)).fetchone()
+    return row[0] if row else None
+
+
+def set_synced_hash(conn: sqlite3.Connection, record_id: str, content_hash: str):
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO synced_records (record_id, content_hash, synced_at) VALUES (?, ?, ?)",
+            (record_id, content_hash, format_airtable_time(datetime.datetime.now(datetime.UTC)))
+        )
+
+
+def add_dead_letter(conn: sqlite3.Connection, record_id: str, error: str):
+    with conn:
+        conn.execute("""
+            INSERT INTO dead_letters (record_id, error, attempts, failed_at) VALUES (?, ?, 1, ?)
+            ON CONFLICT(record_id) DO UPDATE SET
+                error = excluded.error, attempts = attempts + 1, failed_at = excluded.failed_at
+        """, (record_id, error, format_airtable_time(datetime.datetime.now(datetime.UTC))))
+
+
+def remove_dead_letter(conn: sqlite3.Connection, record_id: str):
+    with conn:
+        conn.execute("DELETE FROM dead_letters WHERE record_id = ?", (record_id,))
+
+
+def list_dead_letters(conn: sqlite3.Connection) -> dict:
+    """Returns {record_id: attempts} for records that failed in earlier runs."""
+    return dict(conn.execute("SELECT record_id, attempts FROM dead_letters").fetchall())
+
+
+def index_session_speakers(conn: sqlite3.Connection, records: list):
+    """Replaces the reverse-index rows (speaker or moderator → session) of the given Sessions records."""
+    with conn:
+        for record in records:
+            fields = record.get("fields", {})
+            conn.execute("DELETE FROM speaker_sessions WHERE session_id = ?", (record["id"],))
+            conn.executemany(
+                "INSERT OR IGNORE INTO speaker_sessions (speaker_id, session_id) VALUES (?, ?)",
+                [(speaker_id, record["id"])
+                 for speaker_id in fields.get("Speaker", []) + fields.get("Moderator", [])]
+            )
+
+
+def sessions_for_speakers(conn: sqlite3.Connection, speaker_ids: list) -> set:
+    sessions = set()
+    for i in range(0, len(speaker_ids), 500):
+        chunk = speaker_ids[i:i + 500]
+        rows = conn.execute(
+            f"SELECT session_id FROM speaker_sessions WHERE speaker_id IN ({','.join('?' * len(chunk))})", chunk
+        ).fetchall()
+        sessions.update(row[0] for row in rows)
+    return sessions
+
+
+def record_slide_order(conn: sqlite3.Connection, records: list):
+    """Stores the slide id and SLIDE_ORDER_FIELD value of the given Sessions records."""
+    with conn:
+        for record in records:
+            slide_id = record.get("fields", {}).get("Slide ID")
+            if slide_id:
+                conn.execute("INSERT OR REPLACE INTO slide_order (record_id, slide_id, sort_value) VALUES (?, ?, ?)",
+                             (record["id"], slide_id, sort_value(record)))
+            else:
+                conn.execute("DELETE FROM slide_order WHERE record_id = ?", (record["id"],))
+
+
+def load_slide_order(conn: sqlite3.Connection) -> dict:
+    """Returns {slide_id: sort key} for every session slide whose order is known."""
+    return {slide_id: slide_order_key(value, record_id)
+            for record_id, slide_id, value in conn.execute("SELECT record_id, slide_id, sort_value FROM slide_order")}
+
+
+def format_airtable_time(moment: datetime.datetime) -> str:
+    return moment.astimezone(datetime.UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def content_hash(slide_kwargs: dict, presentation_id: str = None) -> str:
+    """
+    Hashes the rendered inputs of a slide and the deck it goes to: everything
+    but the snapshot index, the mode flags and the color runs (derived from
+    the people and colors).
+    """
+    payload = {k: v for k, v in slide_kwargs.items()
+               if k not in ("slide_index", "record_id", "people_only", "speaker_runs", "moderator_runs")}
+    if presentation_id:
+        payload["presentation_id"] = presentation_id
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
 # ================================================
 # Helper: Adjust Representation
 # ================================================
@@ -110,29 +1249,29 @@ def adjust_representation(s: str) -> str:
 # Helper: Add spaces after commas (outside parentheses)
 # ================================================
 def add_spaces_after_commas_between_people(s: str) -> str:
-    result = ''
+    result = []
     paren_depth = 0
     i = 0
     while i < len(s):
         c = s[i]
         if c == '(':
             paren_depth += 1
-            result += c
+            result.append(c)
             i += 1
         elif c == ')':
             if paren_depth > 0:
                 paren_depth -= 1
-            result += c
+            result.append(c)
             i += 1
         elif c == ',' and paren_depth == 0:
-            result += ', '
+            result.append(', ')
             i += 1
             while i < len(s) and s[i] == ' ':
                 i += 1
         else:
-            result += c
+            result.append(c)
             i += 1
-    return result
+    return ''.join(result)
 
 
 # ================================================
@@ -183,6 +1322,49 @@ def split_people_and_indices(s: str):
     return results
 
 
+# ================================================
+# Helper: People layout (speakers / moderators cells)
+# ================================================
+@functools.lru_cache(maxsize=4096)
+def layout_person(raw: str, status: str) -> tuple:
+    """
+    Formats one person once per (name, status): returns their cell text
+    (adjust_representation) and their COLORS key, or None when uncolored.
+    """
+    color = status_to_color_map.get(status.strip(), "unknown") if status is not None else None
+    return adjust_representation(raw), (color if color in COLORS else None)
+
+
+def layout_people(names: list, statuses: list) -> dict:
+    """
+    Lays out a speakers/moderators cell in one pass over the linked people:
+      - text: the names joined with ", ",
+      - runs: each colored person's range ({startIndex, endIndex, color}),
+        in the shape people_runs returns.
+    The i-th status colors the i-th name; names without one stay uncolored.
+    """
+    parts, runs = [], []
+    offset = 0
+    for idx, raw in enumerate(names):
+        text, color = layout_person(raw, statuses[idx] if idx < len(statuses) else None)
+        if parts:
+            offset += 2
+        parts.append(text)
+        if color and text:
+            runs.append({"startIndex": offset, "endIndex": offset + len(text), "color": color})
+        offset += len(text)
+    return {"text": ", ".join(parts), "runs": runs}
+
+
+# ================================================
+# Helper: Deterministic IDs (for build mode)
+# ================================================
+def deterministic_slide_ids(record_id: str) -> dict:
+    """Object ids for the slide, table and speaker notes created for a Sessions record."""
+    slide_id = f"slide_{record_id}"
+    return {"slide": slide_id, "table": f"{slide_id}_table", "notes": f"{slide_id}_notes"}
+
+
 # ================================================
 # Helper: Generate new IDs (for create mode)
 # ================================================
@@ -198,103 +1380,255 @@ def generate_new_ids(initial_id: str):
 
 
 # ================================================
-# Main Function: Update (or create) a slide in Google Slides
+# Helper: Slide state (what a slide renders, for diffing)
 # ================================================
-def update_presentation_with_slide(service,
-                                   presentation_id: str,
-                                   slide_object_id: str,
-                                   status: str,
-                                   date_time: str,
-                                   note: str,
-                                   title: str,
-                                   channel: str,
-                                   description: str,
-                                   speakers: str,
-                                   speaker_colors: str,
-                                   moderators: str,
-                                   moderator_colors: str,
-                                   slide_id: str = "") -> dict:
-
-    # Process the colors lists from the input strings.
-    speaker_colors_list = [c.strip() for c in speaker_colors.split(",")]
-    moderator_colors_list = [c.strip() for c in moderator_colors.split(",")]
+# Table rows (column 1) of the template, in order.
+TITLE_ROW, DATE_ROW, CHANNEL_ROW, DESCRIPTION_ROW, MODERATORS_ROW, SPEAKERS_ROW = range(6)
 
-    # Choose slide background color based on curation status.
-    if status.strip() == '(5) Confirmed':
-        background_color = {"red": 0.83, "green": 0.898, "blue": 0.812}
-    else:
-        background_color = {"red": 0.804, "green": 0.87, "blue": 0.98}
 
-    requests_list = []
-    table_id = None
+def _plain_text(text_content: dict) -> str:
+    """Joins the text runs of a shape or cell, without the final paragraph newline."""
+    text = "".join(te.get("textRun", {}).get("content", "") for te in text_content.get("textElements", []))
+    return text[:-1] if text.endswith("\n") else text
+
+
+def _rgb_key(rgb: dict) -> tuple:
+    # The API omits zero components and may return slightly different floats.
+    return tuple(round(rgb.get(c, 0), 3) for c in ("red", "green", "blue"))
+
+
+def _merge_runs(runs) -> list:
+    merged = []
+    for start, end, color in sorted(runs):
+        if start >= end:
+            continue
+        if merged and merged[-1][1] == start and merged[-1][2] == color:
+            merged[-1] = (merged[-1][0], end, color)
+        else:
+            merged.append((start, end, color))
+    return merged
+
+
+def _background_runs(text_content: dict) -> list:
+    """Returns the merged (start, end, rgb key) background-colored ranges of a cell."""
+    runs = []
+    for te in text_content.get("textElements", []):
+        rgb = (te.get("textRun", {}).get("style", {}).get("backgroundColor", {})
+               .get("opaqueColor", {}).get("rgbColor"))
+        if rgb is not None:
+            runs.append((te.get("startIndex", 0), te.get("endIndex", 0), _rgb_key(rgb)))
+    return _merge_runs(runs)
+
+
+def people_runs(people: str, colors: str) -> list:
+    """
+    Returns the colored ranges for a speakers/moderators cell as dictionaries
+    with startIndex, endIndex and color (a COLORS key), skipping unknown colors.
+    """
+    colors_list = [c.strip() for c in colors.split(",")]
+    runs = []
+    if people.strip():
+        for idx, entry in enumerate(split_people_and_indices(people)):
+            if idx < len(colors_list):
+                color = colors_list[idx]
+                if color != "unknown" and color in COLORS:
+                    runs.append({"startIndex": entry["startIndex"], "endIndex": entry["endIndex"], "color": color})
+    return runs
+
+
+def background_color_for_status(status: str) -> dict:
+    # Choose slide background color based on curation status.
+    if status.strip() == '(5) Confirmed':
+        return {"red": 0.83, "green": 0.898, "blue": 0.812}
+    return {"red": 0.804, "green": 0.87, "blue": 0.98}
+
+
+def render_slide_state(status: str, date_time: str, note: str, title: str, channel: str, description: str,
+                       speakers: str, speaker_colors: str, moderators: str, moderator_colors: str,
+                       speaker_runs: list = None, moderator_runs: list = None) -> dict:
+    """
+    Returns the state a slide should have for the given Airtable values:
+      - cells: the text of table column 1, indexed by row,
+      - runs: {row: [run, ...]} background-colored ranges of the people cells,
+      - notes: the speaker notes text,
+      - background: the page background rgb color.
+    Runs already laid out by layout_people are used as is; otherwise they are
+    recovered from the joined people text and color list.
+    """
+    if moderator_runs is None:
+        moderator_runs = people_runs(moderators, moderator_colors)
+    if speaker_runs is None:
+        speaker_runs = people_runs(speakers, speaker_colors)
+    return {
+        "cells": [title, date_time, channel, description, moderators, speakers],
+        "runs": {
+            MODERATORS_ROW: moderator_runs,
+            SPEAKERS_ROW: speaker_runs,
+        },
+        "notes": note,
+        "background": background_color_for_status(status),
+    }
+
+
+def read_slide_state(entry: dict) -> dict:
+    """Reads the same shape as render_slide_state (runs as rgb keys) from a slide index entry."""
+    rows = entry["table"]["table"].get("tableRows", []) if entry.get("table") else []
+    cells, runs = [], {}
+    for row_idx in range(SPEAKERS_ROW + 1):
+        try:
+            text_content = rows[row_idx]["tableCells"][1].get("text", {})
+        except (IndexError, KeyError):
+            text_content = {}
+        cells.append(_plain_text(text_content))
+        if row_idx in (MODERATORS_ROW, SPEAKERS_ROW):
+            runs[row_idx] = _background_runs(text_content)
+    notes = entry.get("notes") or {}
+    background = (entry["slide"].get("pageProperties", {}).get("pageBackgroundFill", {})
+                  .get("solidFill", {}).get("color", {}).get("rgbColor"))
+    return {
+        "cells": cells,
+        "runs": runs,
+        "notes": _plain_text(notes.get("shape", {}).get("text", {})),
+        "background": _rgb_key(background) if background is not None else None,
+    }
+
+
+def runs_key(runs: list) -> list:
+    """Converts rendered runs to the comparable form returned by read_slide_state."""
+    return _merge_runs((r["startIndex"], r["endIndex"], _rgb_key(COLORS[r["color"]])) for r in runs)
+
+
+def expected_slide_state(desired: dict) -> dict:
+    """Converts a render_slide_state result to the form returned by read_slide_state."""
+    return {
+        "cells": desired["cells"],
+        "runs": {row_idx: runs_key(runs) for row_idx, runs in desired["runs"].items()},
+        "notes": desired["notes"],
+        "background": _rgb_key(desired["background"]),
+    }
+
+
+def managed_slide_state(state: dict, desired: dict) -> dict:
+    """
+    The parts of a slide state (read_slide_state form) that the sync writes
+    for the desired render: notes only when there are some to write, and
+    color runs only on people cells with text.
+    """
+    return {
+        "cells": state["cells"],
+        "runs": {row_idx: runs for row_idx, runs in state["runs"].items() if desired["cells"][row_idx].strip()},
+        "notes": state["notes"] if desired["notes"].strip() else None,
+        "background": state["background"],
+    }
+
+
+def slide_fingerprint(state: dict) -> str:
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# ================================================
+# Build the Slides requests to update (or create) a slide
+# ================================================
+def build_slide_requests(service,
+                         presentation_id: str,
+                         slide_object_id: str,
+                         status: str,
+                         date_time: str,
+                         note: str,
+                         title: str,
+                         channel: str,
+                         description: str,
+                         speakers: str,
+                         speaker_colors: str,
+                         moderators: str,
+                         moderator_colors: str,
+                         speaker_runs: list = None,
+                         moderator_runs: list = None,
+                         slide_id: str = "",
+                         slide_index: dict = None,
+                         record_id: str = "",
+                         people_only: bool = False) -> list:
+    """
+    Returns the requests that bring the slide in line with the given values.
+    In update mode only the cells, color runs, notes and background that
+    differ from the slide's current state are touched, so an unchanged slide
+    yields an empty list. In create mode (no slide_id), passing the Airtable
+    record_id makes the new object ids deterministic. With people_only, only
+    the speakers and moderators cells (text and color runs) are considered.
+    """
+    desired = render_slide_state(status, date_time, note, title, channel, description,
+                                 speakers, speaker_colors, moderators, moderator_colors,
+                                 speaker_runs, moderator_runs)
+    current = None
+
+    requests_list = []
+    table_id = None
     speaker_notes_id = None
-    table_element = None
-    slide_data = None
 
-    # --- UPDATE mode: if slide_id is provided, fetch slide details ---
+    # --- UPDATE mode: if slide_id is provided, look up slide details ---
+    # The snapshot index is normally fetched once per run by main(); fall back
+    # to fetching it here for one-off calls.
     if slide_id:
         main_slide_id = slide_id
-        presentation = service.presentations().get(presentationId=presentation_id).execute()
-        for page in presentation.get("slides", []):
-            if page.get("objectId") == slide_id:
-                slide_data = page
-                break
-        if not slide_data:
+        if slide_index is None:
+            slide_index = fetch_presentation_index(service, presentation_id)
+        entry = slide_index.get(slide_id)
+        if not entry:
             raise Exception(f"Slide with id {slide_id} not found.")
-        if "pageElements" not in slide_data or not slide_data["pageElements"]:
+        if not entry["slide"].get("pageElements"):
             raise Exception("No page elements found on the slide.")
-        table_element = next((pe for pe in slide_data["pageElements"] if "table" in pe), None)
-        if not table_element:
+        if not entry["table"]:
             raise Exception("No table element found on the slide.")
-        table_id = table_element["objectId"]
-        notes_page = slide_data.get("slideProperties", {}).get("notesPage", {})
-        notes_elements = notes_page.get("pageElements", [])
-        if len(notes_elements) > 1:
-            speaker_notes_id = notes_elements[1]["objectId"]
-        else:
+        table_id = entry["table"]["objectId"]
+        speaker_notes_id = entry["notesId"]
+        if not speaker_notes_id:
             logging.warning("Speaker notes element not found; speaker notes updates may fail.")
+        current = read_slide_state(entry)
     else:
         # --- CREATE mode: duplicate the template slide ---
-        num = (str(random.random() + 1))[7:]
-        main_slide_id = f"{slide_object_id}_{num}"
-        base_ids = generate_new_ids(slide_object_id)
-        table_id = f"{base_ids['idPlusOne']}_{num}"
-        speaker_notes_id = f"{base_ids['idPlusSix']}_{num}"
+        template = (slide_index or {}).get(slide_object_id)
+        if record_id and template and template["table"] and template["notesId"]:
+            # Deterministic ids derived from the record, using the template's
+            # real table and notes ids, so a retried create cannot duplicate.
+            ids = deterministic_slide_ids(record_id)
+            main_slide_id, table_id, speaker_notes_id = ids["slide"], ids["table"], ids["notes"]
+            template_table_id, template_notes_id = template["table"]["objectId"], template["notesId"]
+        else:
+            num = (str(random.random() + 1))[7:]
+            main_slide_id = f"{slide_object_id}_{num}"
+            base_ids = generate_new_ids(slide_object_id)
+            table_id = f"{base_ids['idPlusOne']}_{num}"
+            speaker_notes_id = f"{base_ids['idPlusSix']}_{num}"
+            template_table_id, template_notes_id = base_ids['idPlusOne'], base_ids['idPlusSix']
         duplicate_request = {
             "duplicateObject": {
                 "objectId": slide_object_id,
                 "objectIds": {
                     slide_object_id: main_slide_id,
-                    base_ids['idPlusOne']: table_id,
-                    base_ids['idPlusSix']: speaker_notes_id
+                    template_table_id: table_id,
+                    template_notes_id: speaker_notes_id
                 }
             }
         }
         requests_list.append(duplicate_request)
 
-    # --- Helper: Add a text-update request for a table cell ---
-    def add_text_update(cell_location: dict, text: str):
-        if slide_id and table_element and table_element.get("table"):
-            try:
-                row_idx = cell_location["rowIndex"]
-                col_idx = cell_location["columnIndex"]
-                cell = table_element["table"]["tableRows"][row_idx]["tableCells"][col_idx]
-                has_text = False
-                if cell.get("text", {}).get("textElements"):
-                    for te in cell["text"]["textElements"]:
-                        if te.get("textRun", {}).get("content", "").strip() != "":
-                            has_text = True
-                            break
-                if has_text:
-                    requests_list.append({
-                        "deleteText": {
-                            "objectId": table_id,
-                            "cellLocation": cell_location,
-                            "textRange": {"type": "ALL"}
-                        }
-                    })
-            except Exception as e:
-                logging.warning(f"Error checking cell content, skipping deletion: {e}")
+    # --- Update table cells whose text differs ---
+    changed_rows = set()
+    for row_idx, text in enumerate(desired["cells"]):
+        if current is not None and current["cells"][row_idx] == text:
+            continue
+        if people_only and row_idx not in (MODERATORS_ROW, SPEAKERS_ROW):
+            continue
+        changed_rows.add(row_idx)
+        cell_location = {"rowIndex": row_idx, "columnIndex": 1}
+        if current is not None and current["cells"][row_idx].strip() != "":
+            requests_list.append({
+                "deleteText": {
+                    "objectId": table_id,
+                    "cellLocation": cell_location,
+                    "textRange": {"type": "ALL"}
+                }
+            })
         requests_list.append({
             "insertText": {
                 "objectId": table_id,
@@ -304,44 +1638,32 @@ def update_presentation_with_slide(service,
             }
         })
 
-    # --- Update table cells ---
-    add_text_update({"rowIndex": 0, "columnIndex": 1}, title)
-    add_text_update({"rowIndex": 1, "columnIndex": 1}, date_time)
-    add_text_update({"rowIndex": 2, "columnIndex": 1}, channel)
-    add_text_update({"rowIndex": 3, "columnIndex": 1}, description)
-    add_text_update({"rowIndex": 4, "columnIndex": 1}, moderators)
-    add_text_update({"rowIndex": 5, "columnIndex": 1}, speakers)
-
     # --- Update slide background color ---
-    requests_list.append({
-        "updatePageProperties": {
-            "objectId": main_slide_id,
-            "pageProperties": {
-                "pageBackgroundFill": {
-                    "solidFill": {
-                        "color": {"rgbColor": background_color}
+    if not people_only and (current is None or current["background"] != _rgb_key(desired["background"])):
+        requests_list.append({
+            "updatePageProperties": {
+                "objectId": main_slide_id,
+                "pageProperties": {
+                    "pageBackgroundFill": {
+                        "solidFill": {
+                            "color": {"rgbColor": desired["background"]}
+                        }
                     }
+                },
+                "fields": "pageBackgroundFill.solidFill.color"
+            }
+        })
+
+    # --- Update speaker notes (only if nonempty and changed) ---
+    if (not people_only and speaker_notes_id and note.strip()
+            and (current is None or current["notes"] != note)):
+        if current is not None and current["notes"].strip() != "":
+            requests_list.append({
+                "deleteText": {
+                    "objectId": speaker_notes_id,
+                    "textRange": {"type": "ALL"}
                 }
-            },
-            "fields": "pageBackgroundFill.solidFill.color"
-        }
-    })
-
-    # --- Update speaker notes (only if nonempty) ---
-    if speaker_notes_id and note.strip():
-        if slide_id and slide_data:
-            notes_page = slide_data.get("slideProperties", {}).get("notesPage", {})
-            for pe in notes_page.get("pageElements", []):
-                if pe.get("objectId") == speaker_notes_id and pe.get("shape", {}).get("text", {}).get("textElements"):
-                    notes_content = "".join([te.get("textRun", {}).get("content", "") for te in pe["shape"]["text"]["textElements"]])
-                    if notes_content.strip() not in ["", "\n"]:
-                        requests_list.append({
-                            "deleteText": {
-                                "objectId": speaker_notes_id,
-                                "textRange": {"type": "ALL"}
-                            }
-                        })
-                    break
+            })
         requests_list.append({
             "insertText": {
                 "objectId": speaker_notes_id,
@@ -350,178 +1672,1562 @@ def update_presentation_with_slide(service,
             }
         })
 
-    # --- Reset text background colors for speakers and moderators (if there is text) ---
-    if speakers.strip():
+    # --- Speakers and moderators: reset and reapply background colors ---
+    # Only for cells with text whose text or color runs changed.
+    for row_idx in (SPEAKERS_ROW, MODERATORS_ROW):
+        if not desired["cells"][row_idx].strip():
+            continue
+        runs = desired["runs"][row_idx]
+        if (current is not None and row_idx not in changed_rows
+                and current["runs"][row_idx] == runs_key(runs)):
+            continue
+        requests_list.extend(people_style_requests(table_id, row_idx, runs))
+
+    return requests_list
+
+
+def people_style_requests(table_id: str, row_idx: int, runs: list) -> list:
+    """Clears a people cell's text background and applies one color per person."""
+    cell_location = {"rowIndex": row_idx, "columnIndex": 1}
+    requests_list = [{
+        "updateTextStyle": {
+            "objectId": table_id,
+            "cellLocation": cell_location,
+            "textRange": {"type": "ALL"},
+            "style": {
+                "backgroundColor": {}  # Clear background formatting (transparent)
+            },
+            "fields": "backgroundColor"
+        }
+    }]
+    for run in runs:
         requests_list.append({
             "updateTextStyle": {
                 "objectId": table_id,
-                "cellLocation": {"rowIndex": 5, "columnIndex": 1},
-                "textRange": {"type": "ALL"},
-                "style": {
-                    "backgroundColor": {}  # Clear background formatting (transparent)
+                "cellLocation": cell_location,
+                "textRange": {
+                    "type": "FIXED_RANGE",
+                    "startIndex": run["startIndex"],
+                    "endIndex": run["endIndex"]
                 },
-                "fields": "backgroundColor"
-            }
-        })
-    if moderators.strip():
-        requests_list.append({
-            "updateTextStyle": {
-                "objectId": table_id,
-                "cellLocation": {"rowIndex": 4, "columnIndex": 1},
-                "textRange": {"type": "ALL"},
                 "style": {
-                    "backgroundColor": {}  # Clear background formatting (transparent)
+                    "backgroundColor": {
+                        "opaqueColor": {"rgbColor": COLORS[run["color"]]}
+                    }
                 },
                 "fields": "backgroundColor"
             }
         })
+    return requests_list
 
-    # --- Update text styles for speakers (apply new background colors) ---
-    if speakers.strip():
-        speaker_entries = split_people_and_indices(speakers)
-        for idx, entry in enumerate(speaker_entries):
-            if idx < len(speaker_colors_list):
-                color = speaker_colors_list[idx]
-                if color != "unknown" and color in COLORS:
-                    requests_list.append({
-                        "updateTextStyle": {
-                            "objectId": table_id,
-                            "cellLocation": {"rowIndex": 5, "columnIndex": 1},
-                            "textRange": {
-                                "type": "FIXED_RANGE",
-                                "startIndex": entry["startIndex"],
-                                "endIndex": entry["endIndex"]
-                            },
-                            "style": {
-                                "backgroundColor": {
-                                    "opaqueColor": {"rgbColor": COLORS[color]}
-                                }
-                            },
-                            "fields": "backgroundColor"
-                        }
-                    })
-    # --- Update text styles for moderators (apply new background colors) ---
-    if moderators.strip():
-        moderator_entries = split_people_and_indices(moderators)
-        for idx, entry in enumerate(moderator_entries):
-            if idx < len(moderator_colors_list):
-                color = moderator_colors_list[idx]
-                if color != "unknown" and color in COLORS:
-                    requests_list.append({
-                        "updateTextStyle": {
-                            "objectId": table_id,
-                            "cellLocation": {"rowIndex": 4, "columnIndex": 1},
-                            "textRange": {
-                                "type": "FIXED_RANGE",
-                                "startIndex": entry["startIndex"],
-                                "endIndex": entry["endIndex"]
-                            },
-                            "style": {
-                                "backgroundColor": {
-                                    "opaqueColor": {"rgbColor": COLORS[color]}
-                                }
-                            },
-                            "fields": "backgroundColor"
-                        }
-                    })
 
-    logging.info("Batch update requests: " + str(requests_list))
+# ================================================
+# Helper: Send Slides batchUpdate calls
+# ================================================
+def send_batch_update(service, presentation_id: str, requests_list: list, required_revision_id: str = None) -> dict:
+    # Request lists carry full descriptions; only format them when debugging.
+    logging.debug("Batch update requests: %s", requests_list)
     body = {"requests": requests_list}
-    response = service.presentations().batchUpdate(
-        presentationId=presentation_id,
-        body=body
-    ).execute()
+    if required_revision_id:
+        # Fails with a 400 instead of applying if the deck changed since.
+        body["writeControl"] = {"requiredRevisionId": required_revision_id}
+    METRICS.incr("slides_requests", len(requests_list))
+    METRICS.observe("batch_update_requests", len(requests_list))
+    METRICS.observe("batch_update_bytes", len(json.dumps(body)))
+    with METRICS.timed("api_write"):
+        response = call_with_retry("slides.presentations.batchUpdate", lambda: execute_slides(
+            service.presentations().batchUpdate(presentationId=presentation_id, body=body)
+        ), write_limiter(presentation_id))
     return response
 
 
+def chunk_pending_updates(pending: list, max_requests: int, max_bytes: int) -> list:
+    """
+    Groups (record_id, requests_list) pairs into chunks of at most max_requests
+    requests and roughly max_bytes of JSON. A single record larger than the
+    limits gets a chunk of its own; records are never split across chunks.
+    """
+    chunks = []
+    current, current_requests, current_bytes = [], 0, 0
+    for record_id, requests_list in pending:
+        size = len(json.dumps(requests_list))
+        if current and (current_requests + len(requests_list) > max_requests
+                        or current_bytes + size > max_bytes):
+            chunks.append(current)
+            current, current_requests, current_bytes = [], 0, 0
+        current.append((record_id, requests_list))
+        current_requests += len(requests_list)
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def send_batched_updates(service, presentation_id: str, pending: list,
+                         max_requests: int = None, max_bytes: int = None, workers: int = 1, send=None,
+                         on_result=None) -> dict:
+    """
+    Sends the requests of many records in as few batchUpdate calls as the
+    limits allow. A batchUpdate is atomic, so when a chunk fails it is split
+    in half and each half is retried until the failing record is isolated
+    (quota and server errors are retried as a whole instead).
+
+    Returns {record_id: result}, where result is the record's slice of the
+    batchUpdate response ({"replies": [...]}) or the exception that failed it.
+    With workers > 1, chunks are sent concurrently over the connection pool.
+    `send` replaces send_batch_update (e.g. Decks.write, to pin revisions);
+    on_result(record_id, result) is called as each chunk completes.
+    """
+    send = send or functools.partial(send_batch_update, service, presentation_id)
+    max_requests = max_requests or SLIDES_BATCH_MAX_REQUESTS
+    max_bytes = max_bytes or SLIDES_BATCH_MAX_BYTES
+    results = {}
+
+    def send_chunk(chunk):
+        requests_list = [request for _, record_requests in chunk for request in record_requests]
+        try:
+            response = send(requests_list)
+        except Exception as e:
+            # Retryable errors were already retried; splitting would only
+            # multiply calls against an exhausted quota. Requests built on a
+            # deck that changed since fail as a whole.
+            if len(chunk) == 1 or is_retryable(e) or isinstance(e, DeckChangedError):
+                for record_id, _ in chunk:
+                    results[record_id] = e
+                    if on_result:
+                        on_result(record_id, e)
+                return
+            logging.warning(f"Batch of {len(chunk)} record(s) failed, splitting: {e}")
+            middle = len(chunk) // 2
+            send_chunk(chunk[:middle])
+            send_chunk(chunk[middle:])
+            return
+        replies = response.get("replies", [])
+        offset = 0
+        for record_id, record_requests in chunk:
+            results[record_id] = {
+                "presentationId": response.get("presentationId", presentation_id),
+                "replies": replies[offset:offset + len(record_requests)]
+            }
+            offset += len(record_requests)
+            if on_result:
+                on_result(record_id, results[record_id])
+
+    chunks = chunk_pending_updates(pending, max_requests, max_bytes)
+    if workers <= 1:
+        for chunk in chunks:
+            send_chunk(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(send_chunk, chunks))
+    return results
+
+
+# ================================================
+# Main Function: Update (or create) a slide in Google Slides
+# ================================================
+def update_presentation_with_slide(service, presentation_id: str, **kwargs) -> dict:
+    """
+    Builds the requests for one slide (see build_slide_requests) and sends
+    them. Returns None without calling the API when the slide is unchanged.
+    """
+    with METRICS.timed("request_build"):
+        requests_list = build_slide_requests(service, presentation_id, **kwargs)
+    if not requests_list:
+        return None
+    return send_batch_update(service, presentation_id, requests_list)
+
+
+# ================================================
+# Helper: Slide order (chronological, with as few moves as possible)
+# ================================================
+def sort_value(record: dict) -> str:
+    value = record.get("fields", {}).get(SLIDE_ORDER_FIELD, "")
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    return str(value or "")
+
+
+def slide_order_key(value: str, record_id: str) -> tuple:
+    # Sessions without a time go last; ties keep a stable order.
+    return (value == "", value, record_id)
+
+
+def move_slides(order: list, slide_ids: list, insertion_index: int) -> list:
+    """
+    Returns the slide order after an updateSlidesPosition request, whose
+    insertionIndex counts positions in the order before the move.
+    """
+    moving = set(slide_ids)
+    insertion_index -= sum(1 for slide_id in order[:insertion_index] if slide_id in moving)
+    rest = [slide_id for slide_id in order if slide_id not in moving]
+    return rest[:insertion_index] + list(slide_ids) + rest[insertion_index:]
+
+
+def longest_increasing_run(values: list) -> set:
+    """Positions of one longest strictly increasing subsequence of values (patience sorting)."""
+    tails, tail_positions, previous = [], [], [None] * len(values)
+    for position, value in enumerate(values):
+        i = bisect.bisect_left(tails, value)
+        if i == len(tails):
+            tails.append(value)
+            tail_positions.append(position)
+        else:
+            tails[i] = value
+            tail_positions[i] = position
+        previous[position] = tail_positions[i - 1] if i else None
+    kept = set()
+    position = tail_positions[-1] if tail_positions else None
+    while position is not None:
+        kept.add(position)
+        position = previous[position]
+    return kept
+
+
+def slide_moves(order: list, keys: dict) -> list:
+    """
+    Returns the updateSlidesPosition requests that put the slides of `order`
+    found in keys ({slide_id: sort key}) in key order. Slides without a key
+    (the template, section dividers) are never moved and bound the sections:
+    session slides are sorted within each run of them between two such
+    slides, never across one. In a run, the longest part already in order
+    stays put and every other slide is moved right after its predecessor in
+    key order, so a few changed times give a few moves. The requests are
+    meant to be applied in sequence.
+    """
+    requests_list, order = [], list(order)
+    start = 0
+    while start < len(order):
+        if order[start] not in keys:
+            start += 1
+            continue
+        end = start
+        while end < len(order) and order[end] in keys:
+            end += 1
+        # Moves inside a run keep it where it is, so later runs keep their positions.
+        current = order[start:end]
+        desired = sorted(current, key=keys.__getitem__)
+        rank = {slide_id: i for i, slide_id in enumerate(desired)}
+        kept = {current[position] for position in longest_increasing_run([rank[slide_id] for slide_id in current])}
+        for i, slide_id in enumerate(desired):
+            if slide_id in kept:
+                continue
+            insertion_index = order.index(desired[i - 1], start, end) + 1 if i else start
+            requests_list.append({"updateSlidesPosition": {"slideObjectIds": [slide_id],
+                                                           "insertionIndex": insertion_index}})
+            order = move_slides(order, [slide_id], insertion_index)
+        start = end
+    return requests_list
+
+
+def order_deck(decks: Decks, presentation_id: str, keys: dict) -> tuple:
+    """
+    Moves the session slides of a deck into chronological order in batched
+    writes; returns (moved, failed). Moves go out in sequence; if one fails,
+    the later ones may land slightly off and the next run corrects them.
+    """
+    slide_index = decks.index(presentation_id)
+    with METRICS.timed("request_build"):
+        requests_list = slide_moves(list(slide_index), keys)
+    if not requests_list:
+        return 0, 0
+    pending = [(request["updateSlidesPosition"]["slideObjectIds"][0], [request]) for request in requests_list]
+    results = send_batched_updates(decks.service, presentation_id, pending,
+                                   send=functools.partial(decks.write, presentation_id, slide_index=slide_index))
+    failed = {slide_id: result for slide_id, result in results.items() if isinstance(result, Exception)}
+    for slide_id, error in failed.items():
+        logging.error(f"Error moving slide {slide_id} in {presentation_id}: {error}")
+        print(f"Error moving slide {slide_id} in {presentation_id}: {error}")
+    METRICS.incr("slide_moves", len(results) - len(failed), outcome="moved")
+    METRICS.incr("slide_moves", len(failed), outcome="failed")
+    logging.info(f"Moved {len(results) - len(failed)} slide(s) in {presentation_id} into chronological order.")
+    print(f"Moved {len(results) - len(failed)} slide(s) in {presentation_id} into chronological order.")
+    return len(results) - len(failed), len(failed)
+
+
+# ================================================
+# Helper: Airtable – streamed, prefetched pages
+# ================================================
+def prefetch(iterable, depth: int = 1):
+    """
+    Starts consuming `iterable` on a background thread right away and returns
+    a generator over its items, keeping at most `depth` items buffered. Used to
+    fetch the next Airtable page while the current one is being processed.
+    Exceptions raised by the iterable are re-raised by the generator.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                buffer.put((item, None))
+        except Exception as e:
+            buffer.put((None, e))
+        buffer.put((done, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    def consume():
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+
+    return consume()
+
+
+def iter_session_pages(table, formula: str = None, fields: list = None):
+    """
+    Yields pages of field-projected records (Sessions fields by default)
+    matching the formula. Pages are requested one at a time by offset rather
+    than through table.iterate(): a generator that raised is finished, so a
+    retry has to ask Airtable for the same page again.
+    """
+    options = {"fields": fields or SESSION_FIELDS, "page_size": AIRTABLE_PAGE_SIZE}
+    if formula:
+        options["formula"] = formula
+    while True:
+        with METRICS.timed("airtable_fetch"):
+            response = call_with_retry("airtable.list_records", lambda: table.api.request(
+                method="get", url=table.urls.records, fallback=("post", table.urls.records_post),
+                options=options), AIRTABLE_LIMITER)
+        yield response.get("records", [])
+        offset = response.get("offset")
+        if not offset:
+            return
+        options = {**options, "offset": offset}
+
+
+# ================================================
+# Helper: Speaker changes → affected sessions
+# ================================================
+def ensure_speaker_index(conn: sqlite3.Connection, sessions_table):
+    """Builds the speaker → sessions reverse index with one links-only scan, the first time."""
+    if get_state_value(conn, "speaker_index_built"):
+        return
+    count = 0
+    for page in iter_session_pages(sessions_table, fields=["Speaker", "Moderator"]):
+        index_session_speakers(conn, page)
+        count += len(page)
+    set_state_value(conn, "speaker_index_built", format_airtable_time(datetime.datetime.now(datetime.UTC)))
+    logging.info(f"Built the speaker index from {count} session(s).")
+
+
+def fetch_modified_speaker_ids(api: Api, since_iso: str) -> list:
+    """Ids of Speaker records modified after since_iso (only one small field is fetched)."""
+    speakers_table = api.table(AIRTABLE_BASE_ID, SPEAKERS_TABLE)
+    formula = f"IS_AFTER({{Last Modified}}, '{since_iso}')"
+    ids = []
+    for page in iter_session_pages(speakers_table, formula, fields=["S Status"]):
+        ids.extend(record["id"] for record in page)
+    return ids
+
+
+# ================================================
+# Helper: Airtable – fetch records by id
+# ================================================
+def formula_string(value: str) -> str:
+    """A value quoted as an Airtable formula string literal (backslashes and quotes escaped)."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def fetch_records_by_id(table, record_ids: list, chunk_size: int = 50, **kwargs) -> list:
+    """Fetches the given records with one filtered all() call per chunk of ids."""
+    kwargs.setdefault("fields", SESSION_FIELDS)
+    records = []
+    for i in range(0, len(record_ids), chunk_size):
+        chunk = record_ids[i:i + chunk_size]
+        formula = "OR(" + ", ".join(f"RECORD_ID() = {formula_string(record_id)}" for record_id in chunk) + ")"
+        with METRICS.timed("airtable_fetch"):
+            records.extend(call_with_retry("airtable.all", lambda: table.all(formula=formula, **kwargs),
+                                           AIRTABLE_LIMITER))
+    return records
+
+
+# ================================================
+# Helper: Airtable record → slide values
+# ================================================
+def record_to_slide_kwargs(record: dict, api: Api, statuses: dict, status_stats: dict,
+                           require_slide_id: bool = True):
+    """
+    Returns the keyword arguments for build_slide_requests for a Sessions
+    record (without the slide index), or None for records with no Slide ID
+    unless require_slide_id is False.
+    """
+    fields = record.get("fields", {})
+
+    # --- Slide ID ---
+    slide_id = fields.get("Slide ID", "")
+    if not slide_id and require_slide_id:
+        return None  # Skip records with no Slide ID
+
+    # --- Curation Status ---
+    curation_status_field = fields.get("Curation Status")
+    if isinstance(curation_status_field, list) and curation_status_field:
+        cs_id = curation_status_field[0]
+        cs_name = resolve_curation_status(AIRTABLE_BASE_ID, api, CURATION_STATUS_TABLE, cs_id,
+                                          statuses, status_stats)
+        curation_status_name = cs_name if cs_name else "No Status Available"
+    else:
+        curation_status_name = "No Status Available"
+
+    # --- Speakers & Moderators ---
+    # Use the detailed fields that include name, title, and company, and the
+    # status fields (if available) to map to colors. Each (name, status) is
+    # formatted once per process, however many sessions the person is on.
+    speakers_statuses = fields.get("S Status (from Speaker)", [])
+    moderators_statuses = fields.get("S Status (from Moderator)", [])
+    speakers = layout_people(fields.get("Speaker Name & Title (from Speaker)", []), speakers_statuses)
+    moderators = layout_people(fields.get("Moderator Name & Title", []), moderators_statuses)
+    speaker_colors_str = ",".join([status_to_color_map.get(s.strip(), 'unknown') for s in speakers_statuses])
+    moderator_colors_str = ",".join([status_to_color_map.get(s.strip(), 'unknown') for s in moderators_statuses])
+
+    # --- Additional Fields ---
+    date_time = fields.get("S25 Start Date/Time", "")
+    note = fields.get("Notes", "")
+    title = fields.get("Session Title (<100 characters)", "")
+    channel = fields.get("W Channel Text", "")
+    description = fields.get("Description (<2500 characters)", "")
+
+    return dict(
+        slide_object_id=TEMPLATE_SLIDE_ID,
+        status=curation_status_name,
+        date_time=date_time,
+        note=note,
+        title=title,
+        channel=channel,
+        description=description,
+        speakers=speakers["text"],
+        speaker_colors=speaker_colors_str,
+        moderators=moderators["text"],
+        moderator_colors=moderator_colors_str,
+        speaker_runs=speakers["runs"],
+        moderator_runs=moderators["runs"],
+        slide_id=slide_id
+    )
+
+
+def sync_slide(decks: Decks, presentation_id: str, slide_kwargs: dict, defer: bool = False):
+    """
+    Worker task: builds the requests for one slide of a deck (loading the
+    deck's index if this is its first record) on the shared client and either
+    sends them (returning the result, or None if nothing changed) or, with
+    defer=True, returns the request list for a later batched send (built on
+    slide_kwargs["slide_index"]). If someone else edits the deck meanwhile,
+    the slide is rebuilt once on the reloaded deck.
+    """
+    service = get_shared_slides_service()
+    for attempt in range(2):
+        slide_index = slide_kwargs["slide_index"] = decks.index(presentation_id)
+        with METRICS.timed("request_build"):
+            requests_list = build_slide_requests(service, presentation_id, **slide_kwargs)
+        if defer:
+            return requests_list
+        if not requests_list:
+            return None
+        try:
+            return decks.write(presentation_id, requests_list, slide_index)
+        except DeckChangedError as e:
+            if attempt:
+                raise
+            logging.warning(f"{e} Rebuilding slide {slide_kwargs['slide_id']}.")
+
+
+# ================================================
+# Helper: Sync pipeline (shared by the sync job and the daemon)
+# ================================================
+def sync_records(state: sqlite3.Connection, records, api: Api, statuses: dict, status_stats: dict,
+                 slides_service, decks: Decks, dead_letters: dict, executor: ThreadPoolExecutor = None):
+    """
+    Syncs (record, people_only) pairs to their slides, each in the deck it is
+    routed to, on the worker pool (a new one unless a long-lived executor is
+    passed): skips records whose content hash is unchanged, records failures
+    in the dead-letter list and returns (record_count, failures).
+    """
+    pending = {}  # (presentation id, id(slide index)) -> (slide index, [(record_id, requests_list)])
+    pending_hashes = {}
+    touched = set()
+    failures = 0
+    record_count = 0
+
+    def mark_synced(record_id, record_hash):
+        set_synced_hash(state, record_id, record_hash)
+        if record_id in dead_letters:
+            remove_dead_letter(state, record_id)
+
+    def mark_failed(record_id, error):
+        nonlocal failures
+        failures += 1
+        METRICS.incr("records", outcome="failed")
+        add_dead_letter(state, record_id, str(error))
+        logging.error(f"Error updating slide for record {record_id}: {error}")
+        print(f"Error updating slide for record {record_id}: {error}")
+
+    def handle_result(record_id, record_hash, presentation_id, slide_kwargs, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            mark_failed(record_id, e)
+            return
+        if SLIDES_BATCH_UPDATES and result:
+            # Defer the write; records are sent together in chunks, per deck
+            # and per snapshot of it (requests only hold on the one they were built on).
+            slide_index = slide_kwargs["slide_index"]
+            pending.setdefault((presentation_id, id(slide_index)), (slide_index, []))[1].append((record_id, result))
+            pending_hashes[record_id] = record_hash
+            return
+        mark_synced(record_id, record_hash)
+        if not result:
+            METRICS.incr("records", outcome="up_to_date")
+            logging.info(f"Slide for record {record_id} is up to date; skipped.")
+            return
+        METRICS.incr("records", outcome="updated")
+        logging.info(f"Slide update result for record {record_id}: {result}")
+        print(f"Slide update result for record {record_id}: {result}")
+
+    def flush_pending():
+        # Decks are flushed in parallel, under the shared Slides write quota.
+        with ThreadPoolExecutor(max_workers=len(pending)) as deck_executor:
+            futures = [deck_executor.submit(send_batched_updates, slides_service, presentation_id, deck_pending,
+                                            workers=SYNC_WORKERS,
+                                            send=functools.partial(decks.write, presentation_id,
+                                                                   slide_index=slide_index))
+                       for (presentation_id, _), (slide_index, deck_pending) in pending.items()]
+            results = {}
+            for future in futures:
+                results.update(future.result())
+        for record_id, result in results.items():
+            if isinstance(result, Exception):
+                mark_failed(record_id, result)
+            else:
+                mark_synced(record_id, pending_hashes.pop(record_id))
+                METRICS.incr("records", outcome="updated")
+                logging.info(f"Slide update result for record {record_id}: {result}")
+                print(f"Slide update result for record {record_id}: {result}")
+        pending.clear()
+
+    # Keep memory flat on full resyncs: bound the records in flight and, in
+    # batch mode, flush once enough requests are queued to fill every worker
+    # of a deck. Every deck gets SYNC_WORKERS workers.
+    workers = max(1, SYNC_WORKERS) * len(decks.routes)
+    max_in_flight = 4 * workers
+    flush_threshold = SLIDES_BATCH_MAX_REQUESTS * max(1, SYNC_WORKERS)
+    pool = ThreadPoolExecutor(max_workers=workers) if executor is None else contextlib.nullcontext(executor)
+    with pool as executor:
+        in_flight = {}
+
+        def drain(return_when):
+            done, _ = wait(in_flight, return_when=return_when)
+            for future in done:
+                handle_result(*in_flight.pop(future), future)
+            if any(sum(len(requests_list) for _, requests_list in deck_pending) >= flush_threshold
+                   for _, deck_pending in pending.values()):
+                flush_pending()
+
+        for record, people_only in records:
+            record_count += 1
+            METRICS.incr("records_fetched")
+            try:
+                slide_kwargs = record_to_slide_kwargs(record, api, statuses, status_stats)
+                deck = decks.route(record) if slide_kwargs is not None else None
+            except Exception as e:
+                mark_failed(record.get("id"), e)
+                continue
+            if slide_kwargs is None:
+                if record.get("id") in dead_letters:
+                    remove_dead_letter(state, record.get("id"))
+                continue
+            presentation_id = deck["presentationId"]
+            slide_kwargs["slide_object_id"] = deck["templateSlideId"]
+            if people_only:
+                slide_kwargs["people_only"] = True
+
+            # --- Skip records whose rendered content was already synced ---
+            record_id = record.get("id")
+            record_hash = content_hash(slide_kwargs, presentation_id)
+            if get_synced_hash(state, record_id) == record_hash:
+                METRICS.incr("records", outcome="unchanged")
+                logging.info(f"Record {record_id} unchanged since last sync; skipped.")
+                if record_id in dead_letters:
+                    remove_dead_letter(state, record_id)
+                continue
+
+            if SLIDE_ORDER_ON_SYNC:
+                record_slide_order(state, [record])
+                touched.add(presentation_id)
+
+            # --- Update (or create) the slide; in batch mode only build the requests ---
+            future = executor.submit(sync_slide, decks, presentation_id, slide_kwargs, SLIDES_BATCH_UPDATES)
+            in_flight[future] = (record_id, record_hash, presentation_id, slide_kwargs)
+            if len(in_flight) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+
+        if in_flight:
+            drain(ALL_COMPLETED)
+
+    if pending:
+        flush_pending()
+    # Put slides whose time (or anything else) changed back in order.
+    if touched:
+        keys = load_slide_order(state)
+        for presentation_id in sorted(touched):
+            try:
+                order_deck(decks, presentation_id, keys)
+            except Exception as e:
+                logging.error(f"Error ordering slides in {presentation_id}: {e}")
+                print(f"Error ordering slides in {presentation_id}: {e}")
+    decks.save()
+
+    return record_count, failures
+
+
+# ================================================
+# Helper: Records a run syncs
+# ================================================
+def sync_cutoff(state: sqlite3.Connection, now: datetime.datetime) -> str:
+    """The Last Modified cutoff of a run: the watermark minus the overlap, or the initial lookback."""
+    watermark = get_state_value(state, "watermark")
+    if watermark:
+        since = datetime.datetime.fromisoformat(watermark.replace("Z", "+00:00"))
+        since -= datetime.timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+    else:
+        since = now - datetime.timedelta(hours=INITIAL_LOOKBACK_HOURS)
+    return format_airtable_time(since)
+
+
+def fetch_speaker_changes(api: Api, since_iso: str, propagation: dict) -> list:
+    """
+    Ids of speakers modified after since_iso ([] when propagation is off). A
+    failure is logged and noted in propagation["failed"], so the run keeps
+    its watermark and the next run looks for these changes again.
+    """
+    if not SPEAKER_PROPAGATION:
+        return []
+    try:
+        return fetch_modified_speaker_ids(api, since_iso)
+    except Exception as e:
+        logging.warning(f"Skipping speaker change propagation: {e}")
+        propagation["failed"] = True
+        return []
+
+
+def iter_sync_records(state: sqlite3.Connection, sessions_table, pages, dead_letters: dict, speaker_ids: list,
+                      propagation: dict = None):
+    """
+    Yields (record, people_only) for every record a run should sync: the
+    modified sessions (pages), then records that failed in earlier runs,
+    then sessions whose speakers or moderators changed. If the speaker index
+    cannot be built, propagation["failed"] is set.
+    """
+    seen_ids = set()
+    for page in pages:
+        if SPEAKER_PROPAGATION:
+            index_session_speakers(state, page)
+        for record in page:
+            yield record, False
+        seen_ids.update(record.get("id") for record in page)
+    # Then replay records that failed in earlier runs (the dead-letter list).
+    replay_ids = [record_id for record_id in dead_letters if record_id not in seen_ids]
+    if replay_ids:
+        replayed = fetch_records_by_id(sessions_table, replay_ids)
+        for record_id in set(replay_ids) - {r.get("id") for r in replayed}:
+            logging.warning(f"Dead-letter record {record_id} no longer exists; dropping it.")
+            remove_dead_letter(state, record_id)
+        logging.info(f"Replaying {len(replayed)} previously failed record(s).")
+        print(f"Replaying {len(replayed)} previously failed record(s).")
+        seen_ids.update(replay_ids)
+        for record in replayed:
+            yield record, False
+    # Finally re-render the people colors of sessions whose speakers or
+    # moderators changed without the session itself being modified.
+    if speaker_ids:
+        try:
+            ensure_speaker_index(state, sessions_table)
+        except Exception as e:
+            logging.warning(f"Skipping speaker change propagation: {e}")
+            if propagation is not None:
+                propagation["failed"] = True
+            return
+        affected = sorted(sessions_for_speakers(state, speaker_ids) - seen_ids)
+        if affected:
+            logging.info(f"{len(speaker_ids)} speaker(s) changed; re-rendering colors on {len(affected)} session(s).")
+            print(f"{len(speaker_ids)} speaker(s) changed; re-rendering colors on {len(affected)} session(s).")
+            for record in fetch_records_by_id(sessions_table, affected):
+                yield record, True
+
+
+def advance_watermark(state: sqlite3.Connection, now: datetime.datetime, propagation: dict):
+    """Moves the watermark to now, unless speaker changes could not be propagated this run."""
+    if propagation["failed"]:
+        logging.warning("Speaker changes were not propagated; keeping the watermark so the next run retries them.")
+        print("Speaker changes were not propagated; keeping the watermark so the next run retries them.")
+        return
+    set_state_value(state, "watermark", format_airtable_time(now))
+
+
 # ================================================
 # Main Job: Process Airtable records and update slides
 # ================================================
 def main():
-    # 1. Get current time and compute timestamp one hour ago (UTC)
-    now = datetime.datetime.now(datetime. UTC)
-    one_hour_ago = now - datetime.timedelta(hours=1)
-    one_hour_ago_iso = one_hour_ago.isoformat() + "Z"
-    logging.info("Fetching sessions modified after " + one_hour_ago_iso)
-    print("Fetching sessions modified after " + one_hour_ago_iso)
+    # 1. Load the high-water mark of the last run
+    #    (or fall back to the initial lookback window on the first run).
+    state = open_sync_state()
+    METRICS.reset()
+    reset_retry_state()
+    now = datetime.datetime.now(datetime.UTC)
+    since_iso = sync_cutoff(state, now)
+    logging.info("Fetching sessions modified after " + since_iso)
+    print("Fetching sessions modified after " + since_iso)
 
     # 2. Query Airtable “Sessions” table
-    # Using Airtable’s filterByFormula to select records modified in the last hour and having a Slide ID.
-    filter_formula = f"AND(IS_AFTER({{Last Modified}}, '{one_hour_ago_iso}'), {{Slide ID}})"
+    # Using Airtable’s filterByFormula to select records modified since the watermark and having a Slide ID.
+    filter_formula = f"AND(IS_AFTER({{Last Modified}}, '{since_iso}'), {{Slide ID}})"
+
+    api = get_airtable_api()
+    sessions_table = api.table(AIRTABLE_BASE_ID, SESSIONS_TABLE)
+    # Pages are fetched on a background thread, one page ahead of processing.
+    pages = prefetch(iter_session_pages(sessions_table, filter_formula))
+    dead_letters = list_dead_letters(state)
+    propagation = {"failed": False}
+    speaker_ids = fetch_speaker_changes(api, since_iso, propagation)
+
+    # Most hourly runs find nothing: stop before any Google client setup.
+    first_page = next(pages, [])
+    if not first_page and not dead_letters and not speaker_ids:
+        logging.info("No modified sessions, failed records or speaker changes; nothing to sync.")
+        print("No modified sessions, failed records or speaker changes; nothing to sync.")
+        advance_watermark(state, now, propagation)
+        state.close()
+        export_metrics()
+        return
+    pages = itertools.chain([first_page], pages)
+
+    with METRICS.timed("status_resolution"):
+        statuses = load_curation_statuses(AIRTABLE_BASE_ID, api, CURATION_STATUS_TABLE)
+    status_stats = {"hits": 0, "misses": 0}
+
+    slides_service = get_shared_slides_service()
+    # Each deck is fetched once per run, when its first record comes up;
+    # its records are looked up in that index.
+    decks = Decks(slides_service)
+
+    records = iter_sync_records(state, sessions_table, pages, dead_letters, speaker_ids, propagation)
+    record_count, failures = sync_records(state, records, api, statuses, status_stats,
+                                          slides_service, decks, dead_letters)
+
+    logging.info(f"Processed {record_count} record(s).")
+    print(f"Processed {record_count} record(s).")
+
+    # Failed records are in the dead-letter list and get replayed by the next
+    # run, so the watermark advances unless speaker changes were not seen.
+    if failures:
+        logging.warning(f"{failures} record(s) failed and were added to the dead-letter list.")
+    advance_watermark(state, now, propagation)
+    state.close()
+
+    logging.info(f"Retries per endpoint: {retry_counts()}")
+    print(f"Retries per endpoint: {retry_counts()}")
+
+    logging.info(f"Curation status cache: {status_stats['hits']} hit(s), {status_stats['misses']} miss(es).")
+    print(f"Curation status cache: {status_stats['hits']} hit(s), {status_stats['misses']} miss(es).")
 
-    api = Api(AIRTABLE_API_KEY)
+    phases = ", ".join(f"{phase} {total['seconds']:.2f}s" for phase, total in METRICS.summary()["phases"].items())
+    logging.info(f"Phase timings: {phases}")
+    print(f"Phase timings: {phases}")
+    export_metrics()
+
+
+# ================================================
+# Plan / Apply Jobs: compile a run into a file, then execute it
+# ================================================
+PLAN_VERSION = 1
+
+
+def _plan_line(entry: dict) -> str:
+    return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+def plan_sync(out_path: str, full: bool = False):
+    """
+    Compiles the changes a sync would make into a JSONL plan without writing
+    to any deck: a header, one entry per record with the requests it needs
+    (or the error that kept it from being planned) and a trailer with the
+    revision each deck was planned on. With full, every session with a
+    slide is compared with its deck, not only the modified ones.
+    """
+    state = open_sync_state()
+    METRICS.reset()
+    reset_retry_state()
+    now = datetime.datetime.now(datetime.UTC)
+
+    api = get_airtable_api()
     sessions_table = api.table(AIRTABLE_BASE_ID, SESSIONS_TABLE)
-    records = sessions_table.all(formula=filter_formula)
-    logging.info(f"Found {len(records)} record(s) to process.")
-    print(f"Found {len(records)} record(s) to process.")
-
-    slides_service = get_slides_service()
-
-    for record in records:
-        fields = record.get("fields", {})
-
-        # --- Slide ID ---
-        slide_id = fields.get("Slide ID")
-        if not slide_id:
-            continue  # Skip records with no Slide ID
-
-        # --- Curation Status ---
-        curation_status_field = fields.get("Curation Status")
-        if isinstance(curation_status_field, list) and curation_status_field:
-            cs_id = curation_status_field[0]
-            cs_name = get_airtable_record_column_value(AIRTABLE_BASE_ID, api, CURATION_STATUS_TABLE, cs_id, "Status")
-            curation_status_name = cs_name if cs_name else "No Status Available"
+    propagation = {"failed": False}
+    if full:
+        pages = prefetch(iter_session_pages(sessions_table, "{Slide ID}"))
+        records = ((record, False) for page in pages for record in page)
+    else:
+        since_iso = sync_cutoff(state, now)
+        pages = prefetch(iter_session_pages(
+            sessions_table, f"AND(IS_AFTER({{Last Modified}}, '{since_iso}'), {{Slide ID}})"))
+        speaker_ids = fetch_speaker_changes(api, since_iso, propagation)
+        records = iter_sync_records(state, sessions_table, pages, list_dead_letters(state), speaker_ids,
+                                    propagation)
+    with METRICS.timed("status_resolution"):
+        statuses = load_curation_statuses(AIRTABLE_BASE_ID, api, CURATION_STATUS_TABLE)
+    status_stats = {"hits": 0, "misses": 0}
+
+    slides_service = get_shared_slides_service()
+    decks = Decks(slides_service)
+    seq, unchanged, failed = 0, 0, 0
+    with open(out_path + ".tmp", "w") as f:
+        f.write(_plan_line({"plan": PLAN_VERSION, "createdAt": format_airtable_time(now), "full": full}))
+        for record, people_only in records:
+            record_id = record.get("id")
+            try:
+                slide_kwargs = record_to_slide_kwargs(record, api, statuses, status_stats)
+                if slide_kwargs is None:
+                    continue
+                deck = decks.route(record)
+                presentation_id = deck["presentationId"]
+                slide_kwargs["slide_object_id"] = deck["templateSlideId"]
+                if people_only:
+                    slide_kwargs["people_only"] = True
+                record_hash = content_hash(slide_kwargs, presentation_id)
+                if not full and get_synced_hash(state, record_id) == record_hash:
+                    unchanged += 1
+                    continue
+                slide_kwargs["slide_index"] = decks.index(presentation_id)
+                with METRICS.timed("request_build"):
+                    requests_list = build_slide_requests(slides_service, presentation_id, **slide_kwargs)
+            except Exception as e:
+                seq += 1
+                failed += 1
+                f.write(_plan_line({"seq": seq, "recordId": record_id, "error": str(e)}))
+                continue
+            if not requests_list:
+                unchanged += 1
+                continue
+            seq += 1
+            f.write(_plan_line({"seq": seq, "recordId": record_id, "presentationId": presentation_id,
+                                "hash": record_hash, "requests": requests_list}))
+        # The watermark an applied plan leaves; none if speaker changes were missed.
+        f.write(_plan_line({"end": True, "entries": seq,
+                            "watermark": None if propagation["failed"] else format_airtable_time(now),
+                            "decks": {deck["presentationId"]: deck["revisionId"] for deck in decks.loaded()}}))
+    os.replace(out_path + ".tmp", out_path)
+    # A new plan starts a new journal.
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(out_path + ".acks")
+    decks.save()
+    state.close()
+
+    logging.info(f"Plan: {seq - failed} record(s) to update, {unchanged} unchanged, {failed} failed; "
+                 f"written to {out_path}.")
+    print(f"Plan: {seq - failed} record(s) to update, {unchanged} unchanged, {failed} failed; written to {out_path}.")
+    export_metrics()
+
+
+def read_plan(path: str) -> tuple:
+    """Returns (header, entries, trailer) of a plan file; raises unless the plan is complete."""
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if len(lines) < 2 or lines[0].get("plan") != PLAN_VERSION or not lines[-1].get("end"):
+        raise Exception(f"{path} is not a complete plan file.")
+    return lines[0], lines[1:-1], lines[-1]
+
+
+def read_plan_acks(path: str) -> list:
+    """Returns the acknowledgements journaled so far, in order (a torn last line is ignored)."""
+    acks = []
+    with contextlib.suppress(FileNotFoundError), open(path) as f:
+        for line in f:
+            with contextlib.suppress(ValueError):
+                acks.append(json.loads(line))
+    return acks
+
+
+def apply_plan(path: str, failed_only: bool = False):
+    """
+    Executes a plan file in batched writes, journaling an acknowledgement per
+    entry (with the deck revision it left) to <plan>.acks as each chunk
+    completes. Rerunning resumes after the last acknowledged entries, each
+    deck pinned to the revision its last write left; with failed_only, only
+    the entries that failed are replayed. Applied records get their content
+    hash, failed ones go to the dead-letter list, and the watermark advances
+    once every entry is acknowledged.
+    """
+    state = open_sync_state()
+    METRICS.reset()
+    reset_retry_state()
+    _, entries, trailer = read_plan(path)
+    journal_path = path + ".acks"
+    previous = read_plan_acks(journal_path)
+    acks = {ack["seq"]: ack for ack in previous}
+    if failed_only:
+        todo = [entry for entry in entries if "error" in acks.get(entry["seq"], {})]
+    else:
+        todo = [entry for entry in entries if entry["seq"] not in acks]
+    logging.info(f"Applying {len(todo)} of {len(entries)} plan entries from {path}.")
+    print(f"Applying {len(todo)} of {len(entries)} plan entries from {path}.")
+
+    # Each deck continues from the revision left by its last acknowledged write.
+    revisions = dict(trailer["decks"])
+    for ack in previous:
+        if "revisionId" in ack:
+            revisions[ack["presentationId"]] = ack["revisionId"]
+
+    by_seq = {entry["seq"]: entry for entry in todo}
+    pending = {}
+    for entry in todo:
+        if "requests" in entry:
+            pending.setdefault(entry["presentationId"], []).append((entry["seq"], entry["requests"]))
+    decks = Decks(get_shared_slides_service() if pending else None)
+    slide_indexes = {presentation_id: decks.pin(presentation_id, revisions.get(presentation_id))
+                     for presentation_id in pending}
+    results = {}
+    lock = threading.Lock()
+
+    with open(journal_path, "a") as journal:
+        def acknowledge(seq, result):
+            entry = by_seq[seq]
+            ack = {"seq": seq, "recordId": entry["recordId"]}
+            if isinstance(result, Exception):
+                ack["error"] = str(result)
+            else:
+                ack["presentationId"] = entry["presentationId"]
+                ack["revisionId"] = decks.deck(entry["presentationId"])["revisionId"]
+            with lock:
+                journal.write(_plan_line(ack))
+                journal.flush()
+                results[seq] = ack
+
+        for entry in todo:
+            if "error" in entry:
+                acknowledge(entry["seq"], Exception(entry["error"]))
+        if pending:
+            # Decks are applied in parallel; each deck's chunks go out in order.
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = [executor.submit(send_batched_updates, decks.service, presentation_id, deck_pending,
+                                           send=functools.partial(decks.write, presentation_id,
+                                                                  slide_index=slide_indexes[presentation_id]),
+                                           on_result=acknowledge)
+                           for presentation_id, deck_pending in pending.items()]
+                for future in futures:
+                    future.result()
+    decks.save()
+
+    # Record the outcome in the sync state, including entries acknowledged
+    # by an earlier, interrupted apply.
+    acks.update(results)
+    hashes = {entry["seq"]: entry.get("hash") for entry in entries}
+    dead_letters = list_dead_letters(state)
+    for seq, ack in acks.items():
+        if "error" in ack:
+            if seq in results or ack["recordId"] not in dead_letters:
+                add_dead_letter(state, ack["recordId"], ack["error"])
         else:
-            curation_status_name = "No Status Available"
-
-        # --- Speakers & Moderators ---
-        # Use the detailed fields that include name, title, and company.
-        speakers_raw = fields.get("Speaker Name & Title (from Speaker)", [])
-        moderators_raw = fields.get("Moderator Name & Title", [])
-        # Apply adjust_representation to each element.
-        speakers_list = [adjust_representation(s) for s in speakers_raw]
-        moderators_list = [adjust_representation(s) for s in moderators_raw]
-        # Join with commas (with no extra space) as required.
-        speakers_str = ", ".join(speakers_list)
-        moderators_str = ", ".join(moderators_list)
-
-        # Use the status fields (if available) to map to colors.
-        speakers_statuses = fields.get("S Status (from Speaker)", [])
-        moderators_statuses = fields.get("S Status (from Moderator)", [])
-        speaker_colors_str = ",".join([status_to_color_map.get(s.strip(), 'unknown') for s in speakers_statuses])
-        moderator_colors_str = ",".join([status_to_color_map.get(s.strip(), 'unknown') for s in moderators_statuses])
-
-        # --- Additional Fields ---
-        date_time = fields.get("S25 Start Date/Time", "")
-        note = fields.get("Notes", "")
-        title = fields.get("Session Title (<100 characters)", "")
-        channel = fields.get("W Channel Text", "")
-        description = fields.get("Description (<2500 characters)", "")
-
-        # --- Update (or create) the slide ---
+            set_synced_hash(state, ack["recordId"], hashes[seq])
+            remove_dead_letter(state, ack["recordId"])
+    failed = sum(1 for ack in results.values() if "error" in ack)
+    left = sum(1 for entry in entries if entry["seq"] not in acks)
+    # A plan that missed speaker changes leaves no watermark to move to.
+    if not left and trailer.get("watermark"):
+        watermark = get_state_value(state, "watermark")
+        if not watermark or watermark < trailer["watermark"]:
+            set_state_value(state, "watermark", trailer["watermark"])
+    state.close()
+
+    logging.info(f"Apply: {len(results) - failed} entries applied, {failed} failed, {left} left.")
+    print(f"Apply: {len(results) - failed} entries applied, {failed} failed, {left} left.")
+    if failed:
+        print(f"Replay the failures with: python main.py apply {path} --failed-only "
+              f"(plan again if the deck was edited since the plan was made).")
+    export_metrics()
+
+
+# ================================================
+# Build Job: Generate the whole deck from all Sessions
+# ================================================
+def build_deck():
+    """
+    Creates a slide for every session without one (and brings existing ones
+    up to date) in a few batched duplicateObject + fill calls. New slides get
+    object ids derived from the record id, so rerunning after a partial
+    failure finds them instead of duplicating them; their ids are written back
+    to the Slide ID field in bulk.
+    """
+    state = open_sync_state()
+    METRICS.reset()
+    reset_retry_state()
+
+    api = get_airtable_api()
+    sessions_table = api.table(AIRTABLE_BASE_ID, SESSIONS_TABLE)
+    pages = prefetch(iter_session_pages(sessions_table))
+    with METRICS.timed("status_resolution"):
+        statuses = load_curation_statuses(AIRTABLE_BASE_ID, api, CURATION_STATUS_TABLE)
+    status_stats = {"hits": 0, "misses": 0}
+
+    slides_service = get_shared_slides_service()
+    decks = Decks(slides_service)
+
+    updates, creates, hashes, write_back = {}, {}, {}, {}
+    for page in pages:
+        record_slide_order(state, page)
+        for record in page:
+            record_id = record.get("id")
+            slide_kwargs = record_to_slide_kwargs(record, api, statuses, status_stats, require_slide_id=False)
+            deck = decks.route(record)
+            presentation_id = deck["presentationId"]
+            slide_index = decks.index(presentation_id)
+            if deck["templateSlideId"] not in slide_index:
+                raise Exception(f"Template slide {deck['templateSlideId']} not found in {presentation_id}.")
+            slide_kwargs["slide_object_id"] = deck["templateSlideId"]
+            slide_kwargs["slide_index"] = slide_index
+            slide_id = slide_kwargs["slide_id"]
+            if not slide_id or slide_id not in slide_index:
+                existing = deterministic_slide_ids(record_id)["slide"]
+                if existing in slide_index:
+                    # Created by an earlier build whose write-back did not finish.
+                    slide_kwargs["slide_id"] = existing
+                    write_back[record_id] = existing
+                elif slide_id:
+                    logging.warning(f"Slide {slide_id} of record {record_id} not found; creating a new one.")
+                    slide_kwargs["slide_id"] = ""
+            if not slide_kwargs["slide_id"]:
+                slide_kwargs["record_id"] = record_id
+                write_back[record_id] = deterministic_slide_ids(record_id)["slide"]
+            with METRICS.timed("request_build"):
+                requests_list = build_slide_requests(slides_service, presentation_id, **slide_kwargs)
+            # Hash what the next sync will see: the final Slide ID and no record_id.
+            synced_kwargs = {k: v for k, v in slide_kwargs.items() if k != "record_id"}
+            synced_kwargs["slide_id"] = slide_kwargs["slide_id"] or write_back[record_id]
+            hashes[record_id] = content_hash(synced_kwargs, presentation_id)
+            if requests_list:
+                target = updates if slide_kwargs["slide_id"] else creates
+                target.setdefault(presentation_id, []).append((record_id, requests_list))
+            else:
+                set_synced_hash(state, record_id, hashes[record_id])
+
+    create_count = sum(len(deck_creates) for deck_creates in creates.values())
+    update_count = sum(len(deck_updates) for deck_updates in updates.values())
+    logging.info(f"Build: {create_count} slide(s) to create, {update_count} to update.")
+    print(f"Build: {create_count} slide(s) to create, {update_count} to update.")
+
+    # Every duplicate lands right after the template, so creating in reverse
+    # leaves the new slides in Airtable order. Chunks go out sequentially for
+    # the same reason; the decks are built in parallel.
+    results = {}
+    deck_ids = updates.keys() | creates.keys()
+    if deck_ids:
+        with ThreadPoolExecutor(max_workers=len(deck_ids)) as executor:
+            futures = [executor.submit(send_batched_updates, slides_service, presentation_id,
+                                       updates.get(presentation_id, []) + creates.get(presentation_id, [])[::-1],
+                                       send=functools.partial(decks.write, presentation_id,
+                                                              slide_index=decks.index(presentation_id)))
+                       for presentation_id in deck_ids]
+            for future in futures:
+                results.update(future.result())
+        decks.save()
+    failed = {record_id for record_id, result in results.items() if isinstance(result, Exception)}
+    for record_id in failed:
+        logging.error(f"Error building slide for record {record_id}: {results[record_id]}")
+        print(f"Error building slide for record {record_id}: {results[record_id]}")
+    for record_id in results.keys() - failed:
+        set_synced_hash(state, record_id, hashes[record_id])
+
+    # Write the new slide ids back to Airtable (10 records per request).
+    slide_ids = [{"id": record_id, "fields": {"Slide ID": slide_id}}
+                 for record_id, slide_id in write_back.items() if record_id not in failed]
+    if slide_ids:
+        call_with_retry("airtable.batch_update", lambda: sessions_table.batch_update(slide_ids), AIRTABLE_LIMITER)
+    logging.info(f"Build: wrote {len(slide_ids)} Slide ID(s) back to Airtable; {len(failed)} record(s) failed.")
+    print(f"Build: wrote {len(slide_ids)} Slide ID(s) back to Airtable; {len(failed)} record(s) failed.")
+    state.close()
+    export_metrics()
+
+
+# ================================================
+# Sort Job: Put every deck in chronological order
+# ================================================
+def sort_slides():
+    """
+    Reads the slide id and SLIDE_ORDER_FIELD of every session and moves each
+    deck's session slides into that order, keeping the longest run already
+    in order where it is.
+    """
+    state = open_sync_state()
+    METRICS.reset()
+    reset_retry_state()
+
+    api = get_airtable_api()
+    sessions_table = api.table(AIRTABLE_BASE_ID, SESSIONS_TABLE)
+    fields = ["Slide ID", SLIDE_ORDER_FIELD] + ([DECK_ROUTING_FIELD] if DECK_ROUTING_FIELD else [])
+    for page in prefetch(iter_session_pages(sessions_table, fields=fields)):
+        record_slide_order(state, page)
+    keys = load_slide_order(state)
+    logging.info(f"Ordering {len(keys)} session slide(s) by {SLIDE_ORDER_FIELD}.")
+    print(f"Ordering {len(keys)} session slide(s) by {SLIDE_ORDER_FIELD}.")
+
+    decks = Decks(get_shared_slides_service())
+    deck_ids = sorted({decks.deck(*route)["presentationId"] for route in decks.routes.values()})
+    with ThreadPoolExecutor(max_workers=len(deck_ids)) as executor:
+        results = list(executor.map(lambda presentation_id: order_deck(decks, presentation_id, keys), deck_ids))
+    decks.save()
+    moved, failed = sum(result[0] for result in results), sum(result[1] for result in results)
+    logging.info(f"Sort: moved {moved} slide(s) in {len(deck_ids)} deck(s); {failed} move(s) failed.")
+    print(f"Sort: moved {moved} slide(s) in {len(deck_ids)} deck(s); {failed} move(s) failed.")
+    state.close()
+    export_metrics()
+
+
+# ================================================
+# Audit Job: Compare the whole deck with Airtable
+# ================================================
+def audit_deck(repair: bool = False):
+    """
+    Checks every session's slide against what it should render, from one
+    read of the Sessions table and one download of each deck: compares the
+    fingerprints of the managed parts (table cells, people color runs, notes
+    and background) in memory and reports drifted slides, missing ones (no
+    Slide ID, or not in the session's deck) and orphaned ones (in a deck but
+    no session's Slide ID). With repair, only the drifted slides are brought
+    up to date, in batched writes.
+    """
+    state = open_sync_state()
+    METRICS.reset()
+    reset_retry_state()
+    started = time.monotonic()
+
+    api = get_airtable_api()
+    sessions_table = api.table(AIRTABLE_BASE_ID, SESSIONS_TABLE)
+    pages = prefetch(iter_session_pages(sessions_table))
+    with METRICS.timed("status_resolution"):
+        statuses = load_curation_statuses(AIRTABLE_BASE_ID, api, CURATION_STATUS_TABLE)
+    status_stats = {"hits": 0, "misses": 0}
+
+    # The decks themselves are read, not their cached copies, which are
+    # part of what is being checked.
+    slides_service = get_shared_slides_service()
+    decks = Decks(slides_service, use_cache=False)
+    deck_list = [decks.deck(*route) for route in decks.routes.values()]
+    with ThreadPoolExecutor(max_workers=len(deck_list)) as executor:
+        list(executor.map(lambda deck: decks.index(deck["presentationId"]), deck_list))
+
+    drifted, missing, referenced = {}, [], set()
+    checked = 0
+    for page in pages:
+        for record in page:
+            record_id = record.get("id")
+            try:
+                slide_kwargs = record_to_slide_kwargs(record, api, statuses, status_stats, require_slide_id=False)
+                deck = decks.route(record)
+            except Exception as e:
+                missing.append((record_id, str(e)))
+                continue
+            presentation_id = deck["presentationId"]
+            slide_index = decks.index(presentation_id)
+            slide_id = slide_kwargs["slide_id"]
+            entry = slide_index.get(slide_id) if slide_id else None
+            if entry is None or not entry["table"]:
+                missing.append((record_id, f"slide {slide_id} not in {presentation_id}" if slide_id
+                                else "no Slide ID"))
+                continue
+            referenced.add((presentation_id, slide_id))
+            checked += 1
+
+            desired = render_slide_state(**{k: v for k, v in slide_kwargs.items()
+                                            if k not in ("slide_object_id", "slide_id")})
+            expected = managed_slide_state(expected_slide_state(desired), desired)
+            actual = managed_slide_state(read_slide_state(entry), desired)
+            if slide_fingerprint(expected) == slide_fingerprint(actual):
+                METRICS.incr("audit_slides", outcome="in_sync")
+                continue
+            METRICS.incr("audit_slides", outcome="drifted")
+            parts = ", ".join(part for part in expected if expected[part] != actual[part])
+            logging.info(f"Drifted: slide {slide_id} of record {record_id} in {presentation_id} ({parts}).")
+            print(f"Drifted: slide {slide_id} of record {record_id} in {presentation_id} ({parts}).")
+            slide_kwargs["slide_object_id"] = deck["templateSlideId"]
+            drifted.setdefault(presentation_id, []).append((record_id, slide_kwargs))
+
+    for record_id, reason in missing:
+        METRICS.incr("audit_slides", outcome="missing")
+        logging.info(f"Missing: record {record_id} ({reason}).")
+        print(f"Missing: record {record_id} ({reason}).")
+    orphaned = 0
+    for deck in deck_list:
+        for slide_id in deck["index"]:
+            if slide_id != deck["templateSlideId"] and (deck["presentationId"], slide_id) not in referenced:
+                orphaned += 1
+                METRICS.incr("audit_slides", outcome="orphaned")
+                logging.info(f"Orphaned: slide {slide_id} in {deck['presentationId']}.")
+                print(f"Orphaned: slide {slide_id} in {deck['presentationId']}.")
+
+    drift_count = sum(len(deck_drifted) for deck_drifted in drifted.values())
+    logging.info(f"Audit: {checked} slide(s) checked, {drift_count} drifted, {len(missing)} missing, "
+                 f"{orphaned} orphaned ({time.monotonic() - started:.2f}s).")
+    print(f"Audit: {checked} slide(s) checked, {drift_count} drifted, {len(missing)} missing, "
+          f"{orphaned} orphaned ({time.monotonic() - started:.2f}s).")
+
+    if repair and drifted:
+        pending, hashes = {}, {}
+        for presentation_id, deck_drifted in drifted.items():
+            for record_id, slide_kwargs in deck_drifted:
+                slide_kwargs["slide_index"] = decks.index(presentation_id)
+                with METRICS.timed("request_build"):
+                    requests_list = build_slide_requests(slides_service, presentation_id, **slide_kwargs)
+                hashes[record_id] = content_hash(slide_kwargs, presentation_id)
+                if requests_list:
+                    pending.setdefault(presentation_id, []).append((record_id, requests_list))
+        results = {record_id: None for record_id in hashes}
+        with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+            futures = [executor.submit(send_batched_updates, slides_service, presentation_id, deck_pending,
+                                       workers=SYNC_WORKERS,
+                                       send=functools.partial(decks.write, presentation_id,
+                                                              slide_index=decks.index(presentation_id)))
+                       for presentation_id, deck_pending in pending.items()]
+            for future in futures:
+                results.update(future.result())
+        repaired = 0
+        for record_id, result in results.items():
+            if isinstance(result, Exception):
+                logging.error(f"Error repairing slide for record {record_id}: {result}")
+                print(f"Error repairing slide for record {record_id}: {result}")
+            else:
+                repaired += 1
+                set_synced_hash(state, record_id, hashes[record_id])
+        logging.info(f"Audit: repaired {repaired} of {drift_count} drifted slide(s).")
+        print(f"Audit: repaired {repaired} of {drift_count} drifted slide(s).")
+    decks.save()
+    state.close()
+    export_metrics()
+
+
+# ================================================
+# Daemon: Airtable webhook notifications → slides within seconds
+# ================================================
+class Debouncer:
+    """
+    Collects changed record ids and releases each one once it has been quiet
+    for `delay` seconds (or has waited `max_delay` since its first change), so
+    a burst of edits to one session becomes a single slide update.
+    """
+
+    def __init__(self, delay: float, max_delay: float):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._queued = {}  # record_id -> (first_seen, last_seen, people_only)
+
+    def add(self, record_ids, people_only: bool = False):
+        now = time.monotonic()
+        with self._cond:
+            for record_id in record_ids:
+                first_seen, _, queued_people_only = self._queued.get(record_id, (now, now, True))
+                # A full re-render already covers a people-only one.
+                self._queued[record_id] = (first_seen, now, queued_people_only and people_only)
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queued)
+
+    def _due_at(self, first_seen: float, last_seen: float) -> float:
+        return min(last_seen + self.delay, first_seen + self.max_delay)
+
+    def wait_batch(self, stop: threading.Event) -> dict:
+        """
+        Blocks until some records are due and returns them as
+        {record_id: people_only}. Once stop is set, returns everything still
+        queued (then {}), so shutting down flushes pending edits.
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due = {record_id: people_only for record_id, (first_seen, last_seen, people_only)
+                       in self._queued.items() if stop.is_set() or self._due_at(first_seen, last_seen) <= now}
+                if due or stop.is_set():
+                    for record_id in due:
+                        del self._queued[record_id]
+                    return due
+                next_due = min((self._due_at(first_seen, last_seen) for first_seen, last_seen, _
+                                in self._queued.values()), default=now + 1)
+                self._cond.wait(timeout=max(next_due - now, 0.01))
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
+def webhook_mac(body: bytes) -> str:
+    """The X-Airtable-Content-MAC value Airtable sends for a notification body."""
+    digest = hmac.new(base64.b64decode(AIRTABLE_WEBHOOK_MAC_SECRET), body, hashlib.sha256).hexdigest()
+    return f"hmac-sha256={digest}"
+
+
+RECORD_ID_PATTERN = re.compile(r"rec[A-Za-z0-9]{14}")
+
+
+def webhook_payload_error(payload) -> str:
+    """Why a POSTed notification cannot be queued, or "" when it is well formed."""
+    if not isinstance(payload, dict):
+        return "body is not a JSON object"
+    webhook = payload.get("webhook")
+    if webhook is not None and not (isinstance(webhook, dict) and isinstance(webhook.get("id", ""), str)):
+        return "webhook must be an object with a string id"
+    for key in ("recordIds", "speakerIds"):
+        ids = payload.get(key)
+        if ids is not None and not (isinstance(ids, list) and all(
+                isinstance(i, str) and RECORD_ID_PATTERN.fullmatch(i) for i in ids)):
+            return f"{key} must be a list of Airtable record ids (rec + 14 letters or digits)"
+    return ""
+
+
+def fetch_webhook_changes(api: Api, conn: sqlite3.Connection, webhook_id: str,
+                          sessions_table_id: str, speakers_table_id: str):
+    """
+    Reads the webhook's payloads after the stored cursor and returns the ids of
+    changed or created (sessions, speakers). Listing payloads also extends the
+    webhook's expiry, so a running daemon keeps its webhook alive.
+    """
+    cursor_key = f"webhook_cursor:{webhook_id}"
+    cursor = int(get_state_value(conn, cursor_key) or 1)
+    webhook = api.base(AIRTABLE_BASE_ID).webhook(webhook_id)
+    payloads = call_with_retry("airtable.webhook_payloads", lambda: list(webhook.payloads(cursor=cursor)),
+                               AIRTABLE_LIMITER)
+    session_ids, speaker_ids = set(), set()
+    for payload in payloads:
+        for table_id, ids in ((sessions_table_id, session_ids), (speakers_table_id, speaker_ids)):
+            changes = payload.changed_tables_by_id.get(table_id)
+            if changes is not None:
+                ids.update(changes.changed_records_by_id)
+                ids.update(changes.created_records_by_id)
+        cursor = payload.cursor + 1
+    set_state_value(conn, cursor_key, str(cursor))
+    return session_ids, speaker_ids
+
+
+def poll_webhook_payloads(api: Api, notifications: queue.Queue, debouncer: Debouncer):
+    """
+    Daemon thread: turns queued notifications into debounced record ids.
+    Items are ("webhook", webhook_id) for Airtable pings and ("speakers", ids)
+    for speaker changes posted directly; None stops the thread.
+    """
+    state = open_sync_state()
+    sessions_table = api.table(AIRTABLE_BASE_ID, SESSIONS_TABLE)
+    table_ids = None
+    while (item := notifications.get()) is not None:
+        kind, value = item
         try:
-            result = update_presentation_with_slide(
-                service=slides_service,
-                presentation_id=GOOGLE_PRESENTATION_ID,
-                slide_object_id=TEMPLATE_SLIDE_ID,
-                status=curation_status_name,
-                date_time=date_time,
-                note=note,
-                title=title,
-                channel=channel,
-                description=description,
-                speakers=speakers_str,
-                speaker_colors=speaker_colors_str,
-                moderators=moderators_str,
-                moderator_colors=moderator_colors_str,
-                slide_id=slide_id
-            )
-            logging.info(f"Slide update result for record {record.get('id')}: {result}")
-            print(f"Slide update result for record {record.get('id')}: {result}")
+            if kind == "webhook":
+                if table_ids is None:
+                    table_ids = (sessions_table.id, api.table(AIRTABLE_BASE_ID, SPEAKERS_TABLE).id)
+                session_ids, speaker_ids = fetch_webhook_changes(api, state, value, *table_ids)
+                debouncer.add(session_ids)
+            else:
+                speaker_ids = value
+            if speaker_ids and SPEAKER_PROPAGATION:
+                ensure_speaker_index(state, sessions_table)
+                debouncer.add(sessions_for_speakers(state, speaker_ids), people_only=True)
         except Exception as e:
-            logging.error(f"Error updating slide for record {record.get('id')}: {e}")
-            print(f"Error updating slide for record {record.get('id')}: {e}")
+            logging.error(f"Error handling {kind} notification {value}: {e}")
+    state.close()
+
+
+def daemon_sync_loop(api: Api, debouncer: Debouncer, stop: threading.Event):
+    """
+    Daemon thread: syncs each debounced batch with warm clients. A deck is
+    loaded once, when its first record arrives; before a batch only its
+    revision is checked (it is reloaded if someone else edited it), and
+    curation statuses are reloaded once they are older than their cache TTL.
+    """
+    state = open_sync_state()
+    sessions_table = api.table(AIRTABLE_BASE_ID, SESSIONS_TABLE)
+    slides_service = get_shared_slides_service()
+    decks = Decks(slides_service)
+    statuses, statuses_loaded = {}, None
+    status_stats = {"hits": 0, "misses": 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, SYNC_WORKERS) * len(decks.routes)) as executor:
+        while batch := debouncer.wait_batch(stop):
+            started = time.monotonic()
+            try:
+                if statuses_loaded is None or started - statuses_loaded > CURATION_STATUS_CACHE_TTL:
+                    with METRICS.timed("status_resolution"):
+                        statuses = load_curation_statuses(AIRTABLE_BASE_ID, api, CURATION_STATUS_TABLE)
+                    statuses_loaded = started
+                records = fetch_records_by_id(sessions_table, sorted(batch))
+                if SPEAKER_PROPAGATION:
+                    index_session_speakers(state, records)
+                touched = set()
+                for record in records:
+                    # Unroutable records are reported by sync_records.
+                    with contextlib.suppress(Exception):
+                        touched.add(decks.route(record)["presentationId"])
+                for presentation_id in touched:
+                    decks.validate(presentation_id)
+                record_count, failures = sync_records(
+                    state, ((record, batch[record["id"]]) for record in records), api, statuses, status_stats,
+                    slides_service, decks, list_dead_letters(state), executor)
+            except Exception as e:
+                logging.error(f"Error syncing {len(batch)} record(s): {e}")
+                print(f"Error syncing {len(batch)} record(s): {e}")
+                continue
+            logging.info(f"Synced {record_count} record(s) in {time.monotonic() - started:.2f}s ({failures} failed).")
+            print(f"Synced {record_count} record(s) in {time.monotonic() - started:.2f}s ({failures} failed).")
+    state.close()
+
+
+def make_webhook_handler(debouncer: Debouncer, notifications: queue.Queue):
+    """
+    Request handler for the daemon. POST accepts an Airtable webhook
+    notification ({"webhook": {"id": ...}}) or, for local testing and other
+    senders, {"recordIds": [...]} / {"speakerIds": [...]}. GET /healthz reports
+    the queue and GET /metrics serves the Prometheus metrics.
+    """
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body, content_type: str = "application/json"):
+            data = (json.dumps(body) if content_type == "application/json" else body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                return self._reply(400, {"error": "invalid Content-Length"})
+            body = self.rfile.read(length)
+            if AIRTABLE_WEBHOOK_MAC_SECRET and not hmac.compare_digest(
+                    webhook_mac(body), self.headers.get("X-Airtable-Content-MAC", "")):
+                return self._reply(401, {"error": "invalid X-Airtable-Content-MAC"})
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                return self._reply(400, {"error": "body is not JSON"})
+            if error := webhook_payload_error(payload):
+                return self._reply(400, {"error": error})
+            METRICS.incr("webhook_notifications")
+            if (payload.get("webhook") or {}).get("id"):
+                notifications.put(("webhook", payload["webhook"]["id"]))
+            if payload.get("speakerIds"):
+                notifications.put(("speakers", list(payload["speakerIds"])))
+            debouncer.add(payload.get("recordIds") or [])
+            self._reply(200, {"queued": debouncer.pending()})
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                return self._reply(200, {"status": "ok", "queued": debouncer.pending()})
+            if self.path == "/metrics":
+                return self._reply(200, METRICS.to_prometheus(), "text/plain; version=0.0.4")
+            self._reply(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            logging.debug(f"{self.address_string()} {format % args}")
+
+    return WebhookHandler
+
+
+def run_daemon(host: str = None, port: int = None):
+    """
+    Serves the webhook endpoint until interrupted. Notifications are answered
+    immediately; a poller thread reads the changed record ids and a sync
+    thread pushes each debounced batch to the deck. Records edited but not
+    yet synced at shutdown are flushed before exiting.
+    """
+    METRICS.reset()
+    reset_retry_state()
+    api = get_airtable_api()
+    debouncer = Debouncer(DEBOUNCE_SECONDS, DEBOUNCE_MAX_SECONDS)
+    notifications = queue.Queue()
+    stop = threading.Event()
+    host, port = host or DAEMON_HOST, port or DAEMON_PORT
+    server = ThreadingHTTPServer((host, port), make_webhook_handler(debouncer, notifications))
+    threads = [
+        threading.Thread(target=poll_webhook_payloads, args=(api, notifications, debouncer), daemon=True),
+        threading.Thread(target=daemon_sync_loop, args=(api, debouncer, stop), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    logging.info(f"Listening for Airtable webhook notifications on http://{host}:{port}/")
+    print(f"Listening for Airtable webhook notifications on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        notifications.put(None)
+        threads[0].join()
+        stop.set()
+        debouncer.wake()
+        threads[1].join()
+        export_metrics()
+
+
+def send_notification(url: str, record_ids: list = None, speaker_ids: list = None) -> dict:
+    """Stub webhook sender: posts changed record ids to a running daemon (signed when a MAC secret is set)."""
+    body = json.dumps({"recordIds": record_ids or [], "speakerIds": speaker_ids or []}).encode()
+    request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
+    if AIRTABLE_WEBHOOK_MAC_SECRET:
+        request.add_header("X-Airtable-Content-MAC", webhook_mac(body))
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Sync Airtable sessions to Google Slides.")
+    parser.add_argument("command", nargs="?", default="sync",
+                        choices=["sync", "plan", "apply", "build", "sort", "audit", "daemon", "notify"],
+                        help="sync: update slides of recently modified sessions (default); "
+                             "plan: write the changes a sync would make to a plan file; "
+                             "apply: execute (or resume) a plan file; "
+                             "build: create or update a slide for every session; "
+                             "sort: put the session slides in chronological order; "
+                             "audit: report slides that differ from Airtable, are missing or orphaned; "
+                             "daemon: serve the Airtable webhook endpoint and sync changes as they arrive; "
+                             "notify: send record ids to a running daemon")
+    parser.add_argument("ids", nargs="*", help="notify: Sessions record ids (Speaker ids with --speakers); "
+                                               "apply: the plan file (default plan.jsonl)")
+    parser.add_argument("--host", help=f"daemon: listen address (default DAEMON_HOST, {DAEMON_HOST})")
+    parser.add_argument("--port", type=int, help=f"daemon: listen port (default DAEMON_PORT, {DAEMON_PORT})")
+    parser.add_argument("--url", default=f"http://localhost:{DAEMON_PORT}/", help="notify: daemon endpoint")
+    parser.add_argument("--speakers", action="store_true", help="notify: the ids are Speaker records")
+    parser.add_argument("--repair", action="store_true", help="audit: update the drifted slides")
+    parser.add_argument("--out", default="plan.jsonl", help="plan: the plan file to write")
+    parser.add_argument("--all", action="store_true", help="plan: compare every session, not only modified ones")
+    parser.add_argument("--failed-only", action="store_true", help="apply: replay only the failed entries")
+    args = parser.parse_args()
+    if args.command == "plan":
+        plan_sync(args.out, args.all)
+    elif args.command == "apply":
+        apply_plan(args.ids[0] if args.ids else "plan.jsonl", args.failed_only)
+    elif args.command == "build":
+        build_deck()
+    elif args.command == "sort":
+        sort_slides()
+    elif args.command == "audit":
+        audit_deck(args.repair)
+    elif args.command == "daemon":
+        run_daemon(args.host, args.port)
+    elif args.command == "notify":
+        if args.speakers:
+            print(send_notification(args.url, speaker_ids=args.ids))
+        else:
+            print(send_notification(args.url, record_ids=args.ids))
+    else:
+        main()
 
 
 if __name__ == "__main__":
-    main()
+    cli()
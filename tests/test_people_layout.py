@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+import benchmark
+import main
+
+
+def test_people_are_joined_and_colored_by_status():
+    layout = main.layout_people(["Ada Lovelace ( CTO , Acme )", "Alan Turing"], ["Registered", "Idea"])
+    assert layout["text"] == "Ada Lovelace (CTO, Acme), Alan Turing"
+    assert layout["runs"] == [
+        {"startIndex": 0, "endIndex": 24, "color": "green"},
+        {"startIndex": 26, "endIndex": 37, "color": "red"},
+    ]
+
+
+def test_people_without_a_known_status_stay_uncolored():
+    layout = main.layout_people(["Ada Lovelace", "Alan Turing", "Grace Hopper"], ["Not A Status", None])
+    assert layout["text"] == "Ada Lovelace, Alan Turing, Grace Hopper"
+    assert layout["runs"] == []
+
+
+def test_no_people_is_an_empty_cell():
+    assert main.layout_people([], []) == {"text": "", "runs": []}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_layout_matches_the_string_helpers(seed):
+    rng = random.Random(seed)
+    names = [benchmark._person(rng) for _ in range(rng.randint(1, 6))]
+    statuses = [rng.choice(list(main.status_to_color_map) + ["Unknown"]) for _ in names]
+    assert main.layout_people(names, statuses) == benchmark.layout_with_helpers(names, statuses)
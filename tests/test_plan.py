@@ -0,0 +1,129 @@
+import contextlib
+import io
+import logging
+
+import pytest
+
+import benchmark
+import main
+
+
+@pytest.fixture
+def backends(tmp_path, monkeypatch):
+    """Fake Slides and Airtable backends for 60 sessions, most of them needing an update."""
+    monkeypatch.setattr(main, "SLIDES_BATCH_MAX_REQUESTS", 10)
+    logging.disable(logging.CRITICAL)
+    dataset = benchmark.generate_dataset(60, seed=11)
+    with benchmark.patched_main(dataset, str(tmp_path)) as (slides, airtable):
+        yield slides, airtable, str(tmp_path / "plan.jsonl")
+    logging.disable(logging.NOTSET)
+
+
+def quietly(fn, *args, **kwargs) -> str:
+    """Runs fn and returns what it printed."""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        fn(*args, **kwargs)
+    return output.getvalue()
+
+
+def synced_state():
+    state = main.open_sync_state()
+    try:
+        return main.get_state_value(state, "watermark"), main.list_dead_letters(state)
+    finally:
+        state.close()
+
+
+def test_read_plan_requires_a_complete_file(tmp_path):
+    path = tmp_path / "plan.jsonl"
+    header = {"plan": main.PLAN_VERSION, "createdAt": "2025-06-02T12:00:00.000000Z", "full": False}
+    entry = {"seq": 1, "recordId": "rec12345678901234", "error": "no slide"}
+    path.write_text(main._plan_line(header) + main._plan_line(entry))
+    with pytest.raises(Exception, match="not a complete plan"):
+        main.read_plan(str(path))
+    trailer = {"end": True, "entries": 1, "watermark": None, "decks": {}}
+    path.write_text(main._plan_line(header) + main._plan_line(entry) + main._plan_line(trailer))
+    assert main.read_plan(str(path)) == (header, [entry], trailer)
+
+
+def test_read_plan_acks_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / "plan.jsonl.acks"
+    path.write_text(main._plan_line({"seq": 1, "recordId": "recA"}) + '{"seq": 2, "reco')
+    assert main.read_plan_acks(str(path)) == [{"seq": 1, "recordId": "recA"}]
+    assert main.read_plan_acks(str(tmp_path / "missing.acks")) == []
+
+
+def test_plan_writes_nothing(backends):
+    slides, _, plan = backends
+    quietly(main.plan_sync, plan)
+    _, entries, trailer = main.read_plan(plan)
+    assert entries
+    assert all("requests" in entry for entry in entries)
+    assert trailer["entries"] == len(entries)
+    assert slides.stats["batchUpdate"] == 0
+    assert synced_state() == (None, {})
+
+
+def test_interrupted_apply_resumes_from_the_journal(backends):
+    slides, _, plan = backends
+    quietly(main.plan_sync, plan)
+    _, entries, trailer = main.read_plan(plan)
+    send = slides._batch_update
+    calls = []
+
+    def crash_on_third_write(presentation_id, body):
+        calls.append(presentation_id)
+        if len(calls) == 3:
+            raise KeyboardInterrupt()
+        return send(presentation_id, body)
+
+    slides._batch_update = crash_on_third_write
+    with pytest.raises(KeyboardInterrupt):
+        quietly(main.apply_plan, plan)
+    acknowledged = {ack["seq"] for ack in main.read_plan_acks(plan + ".acks")}
+    assert acknowledged and len(acknowledged) < len(entries)
+    assert synced_state()[0] is None
+
+    slides._batch_update = send
+    output = quietly(main.apply_plan, plan)
+    # Only the entries the first apply did not acknowledge are sent.
+    assert f"Applying {len(entries) - len(acknowledged)} of {len(entries)} plan entries" in output
+    acks = main.read_plan_acks(plan + ".acks")
+    assert sorted(ack["seq"] for ack in acks) == [entry["seq"] for entry in entries]
+    assert not any("error" in ack for ack in acks)
+    assert synced_state() == (trailer["watermark"], {})
+
+    # Nothing is left: another apply sends nothing, and a sync finds nothing to change.
+    writes = slides.stats["batchUpdate"]
+    quietly(main.apply_plan, plan)
+    quietly(main.main)
+    assert slides.stats["batchUpdate"] == writes
+
+
+def test_failed_entries_are_dead_lettered_and_replayed_with_failed_only(backends):
+    slides, _, plan = backends
+    quietly(main.plan_sync, plan)
+    _, entries, trailer = main.read_plan(plan)
+    victim = entries[-1]
+    target = next(iter(victim["requests"][-1].values()))["objectId"]
+    apply_request = slides._apply
+    broken = [True]
+
+    def fail_victim(working, request):
+        if broken[0] and next(iter(request.values())).get("objectId") == target:
+            raise benchmark.FakeHttpError(400, "Invalid requests")
+        return apply_request(working, request)
+
+    slides._apply = fail_victim
+    quietly(main.apply_plan, plan)
+    watermark, dead_letters = synced_state()
+    assert victim["recordId"] in dead_letters
+    assert watermark == trailer["watermark"]
+
+    broken[0] = False
+    output = quietly(main.apply_plan, plan, failed_only=True)
+    assert f"Applying {len(dead_letters)} of {len(entries)} plan entries" in output
+    acks = main.read_plan_acks(plan + ".acks")
+    assert "error" not in [ack for ack in acks if ack["seq"] == victim["seq"]][-1]
+    assert synced_state() == (trailer["watermark"], {})
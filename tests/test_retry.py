@@ -0,0 +1,46 @@
+import pytest
+
+import main
+
+
+class Response(dict):
+    def __init__(self, status: int, headers: dict):
+        super().__init__(headers)
+        self.status = status
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, headers: dict = None):
+        super().__init__(f"HTTP {status}")
+        self.resp = Response(status, headers or {})
+
+
+def test_retry_after_is_capped_at_the_max_delay(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(main.time, "sleep", sleeps.append)
+    monkeypatch.setattr(main, "RETRY_MAX_DELAY", 5.0)
+    main.reset_retry_state(10)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise HttpError(429, {"retry-after": "3600"})
+        return "ok"
+
+    assert main.call_with_retry("test.endpoint", flaky) == "ok"
+    assert sleeps == [5.0, 5.0]
+
+
+def test_non_retryable_errors_are_raised_at_once(monkeypatch):
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+    main.reset_retry_state(10)
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise HttpError(400)
+
+    with pytest.raises(HttpError):
+        main.call_with_retry("test.endpoint", bad_request)
+    assert len(calls) == 1
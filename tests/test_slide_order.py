@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+import main
+
+
+def apply_moves(order: list, requests_list: list) -> list:
+    for request in requests_list:
+        params = request["updateSlidesPosition"]
+        order = main.move_slides(order, params["slideObjectIds"], params["insertionIndex"])
+    return order
+
+
+def runs(order: list, keys: dict) -> list:
+    """The runs of session slides between slides without a key."""
+    result, run = [], []
+    for slide_id in order + [None]:
+        if slide_id in keys:
+            run.append(slide_id)
+        elif run:
+            result.append(run)
+            run = []
+    return result
+
+
+def test_move_slides_counts_insertion_index_before_the_move():
+    assert main.move_slides(["a", "b", "c", "d"], ["a"], 3) == ["b", "c", "a", "d"]
+    assert main.move_slides(["a", "b", "c", "d"], ["d"], 0) == ["d", "a", "b", "c"]
+
+
+def test_longest_increasing_run():
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    kept = sorted(main.longest_increasing_run(values))
+    assert len(kept) == 4
+    assert [values[i] for i in kept] == sorted(values[i] for i in kept)
+
+
+def test_sorted_deck_needs_no_moves():
+    keys = {f"s{i}": main.slide_order_key(f"2025-06-0{i} 10:00", f"rec{i}") for i in range(1, 6)}
+    assert main.slide_moves(["template"] + list(keys), keys) == []
+
+
+def test_one_retimed_slide_is_one_move():
+    order = ["template", "s1", "s2", "s3", "s4"]
+    keys = {"s1": (False, "1", "s1"), "s2": (False, "9", "s2"), "s3": (False, "3", "s3"), "s4": (False, "4", "s4")}
+    requests_list = main.slide_moves(order, keys)
+    assert len(requests_list) == 1
+    assert apply_moves(order, requests_list) == ["template", "s1", "s3", "s4", "s2"]
+
+
+def test_sessions_without_a_time_go_last():
+    keys = {"a": main.slide_order_key("", "recA"), "b": main.slide_order_key("2025-06-01", "recB")}
+    assert apply_moves(["a", "b"], main.slide_moves(["a", "b"], keys)) == ["b", "a"]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_decks_are_sorted_between_fixed_slides_with_fewest_moves(seed):
+    rng = random.Random(seed)
+    order = [f"s{i}" for i in range(rng.randint(0, 30))] + [f"divider{i}" for i in range(rng.randint(0, 4))]
+    rng.shuffle(order)
+    keys = {slide_id: (False, f"{rng.randint(0, 9)}", slide_id) for slide_id in order if slide_id.startswith("s")}
+
+    requests_list = main.slide_moves(order, keys)
+    result = apply_moves(order, requests_list)
+
+    # Slides without a key stay exactly where they were.
+    assert [i for i, slide_id in enumerate(result) if slide_id not in keys] == \
+           [i for i, slide_id in enumerate(order) if slide_id not in keys]
+    # Every run holds the same slides as before, now in key order.
+    for before, after in zip(runs(order, keys), runs(result, keys)):
+        assert after == sorted(before, key=keys.__getitem__)
+    # Only the slides outside each run's longest ordered part move.
+    expected_moves = 0
+    for run in runs(order, keys):
+        rank = {slide_id: i for i, slide_id in enumerate(sorted(run, key=keys.__getitem__))}
+        expected_moves += len(run) - len(main.longest_increasing_run([rank[slide_id] for slide_id in run]))
+    assert len(requests_list) == expected_moves
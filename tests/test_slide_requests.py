@@ -0,0 +1,84 @@
+import copy
+
+import pytest
+
+import benchmark
+import main
+
+FIELDS = {
+    "Slide ID": "s1",
+    "Curation Status": ["recStatus"],
+    "S25 Start Date/Time": "2025-06-02 10:00",
+    "Notes": "Bring the demo laptop",
+    "Session Title (<100 characters)": "Scaling Event Slides",
+    "W Channel Text": "Main Stage",
+    "Description (<2500 characters)": "How the deck stays in sync",
+    "Speaker Name & Title (from Speaker)": ["Ada Lovelace (CTO,Acme)", "Alan Turing"],
+    "S Status (from Speaker)": ["Registered", "Idea"],
+    "Moderator Name & Title": ["Grace Hopper (Founder,Globex)"],
+    "S Status (from Moderator)": ["Registered"],
+}
+
+
+def session_kwargs(status: str = "(5) Confirmed", **changes) -> dict:
+    """build_slide_requests arguments for a Sessions record, as the sync derives them."""
+    record = {"id": "recSession", "fields": dict(FIELDS, **changes)}
+    kwargs = main.record_to_slide_kwargs(record, None, {"recStatus": status}, {"hits": 0, "misses": 0})
+    kwargs.pop("slide_id")
+    kwargs.pop("slide_object_id")
+    return kwargs
+
+
+def rendered_index(kwargs: dict) -> dict:
+    """A slide index holding one slide that already shows kwargs."""
+    state = main.render_slide_state(*(kwargs[name] for name in (
+        "status", "date_time", "note", "title", "channel", "description", "speakers", "speaker_colors",
+        "moderators", "moderator_colors", "speaker_runs", "moderator_runs")))
+    return main.build_slide_index({"slides": [benchmark._slide("s1", state)]})
+
+
+def build(slide_index: dict, kwargs: dict, **options) -> list:
+    return main.build_slide_requests(None, "deck", "template", slide_id="s1", slide_index=slide_index,
+                                     **kwargs, **options)
+
+
+def test_unchanged_slide_needs_no_requests():
+    kwargs = session_kwargs()
+    assert build(rendered_index(kwargs), kwargs) == []
+
+
+def test_unchanged_slide_needs_no_requests_in_people_only_mode():
+    kwargs = session_kwargs()
+    assert build(rendered_index(kwargs), kwargs, people_only=True) == []
+
+
+def test_changed_title_touches_only_the_title_cell():
+    slide_index = rendered_index(session_kwargs())
+    requests_list = build(slide_index, session_kwargs(**{"Session Title (<100 characters)": "A New Title"}))
+    assert [next(iter(request)) for request in requests_list] == ["deleteText", "insertText"]
+    assert {request[next(iter(request))]["cellLocation"]["rowIndex"] for request in requests_list} == {0}
+    assert requests_list[1]["insertText"]["text"] == "A New Title"
+
+
+def test_changed_speaker_status_only_restyles_the_speakers_cell():
+    slide_index = rendered_index(session_kwargs())
+    requests_list = build(slide_index, session_kwargs(**{"S Status (from Speaker)": ["Registered", "Registered"]}))
+    assert requests_list
+    assert all("updateTextStyle" in request for request in requests_list)
+    assert {request["updateTextStyle"]["cellLocation"]["rowIndex"] for request in requests_list} == {main.SPEAKERS_ROW}
+
+
+@pytest.mark.parametrize("changes", [
+    {},
+    {"Session Title (<100 characters)": "Retitled"},
+    {"Notes": "New notes"},
+    {"status": "(1) Idea"},
+    {"Speaker Name & Title (from Speaker)": ["Alan Turing"], "S Status (from Speaker)": ["Idea"]},
+    {"Moderator Name & Title": [], "S Status (from Moderator)": []},
+])
+def test_applied_requests_leave_nothing_to_do(changes):
+    slide_index = rendered_index(session_kwargs())
+    objects = main.index_object_ids(slide_index)
+    kwargs = session_kwargs(**changes)
+    main.apply_local_requests(slide_index, objects, copy.deepcopy(build(slide_index, kwargs)))
+    assert build(main.build_slide_index({"slides": [slide_index["s1"]["slide"]]}), kwargs) == []
@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+
+import main
+
+NOW = datetime.datetime(2025, 6, 2, 12, 0, tzinfo=datetime.UTC)
+
+
+@pytest.fixture
+def state(tmp_path):
+    conn = main.open_sync_state(str(tmp_path / "sync_state.sqlite3"))
+    yield conn
+    conn.close()
+
+
+def test_first_run_looks_back_the_initial_window(state, monkeypatch):
+    monkeypatch.setattr(main, "INITIAL_LOOKBACK_HOURS", 3)
+    assert main.sync_cutoff(state, NOW) == "2025-06-02T09:00:00.000000Z"
+
+
+def test_later_runs_start_before_the_watermark_by_the_overlap(state, monkeypatch):
+    monkeypatch.setattr(main, "WATERMARK_OVERLAP_SECONDS", 60)
+    main.set_state_value(state, "watermark", "2025-06-02T11:00:00.000000Z")
+    assert main.sync_cutoff(state, NOW) == "2025-06-02T10:59:00.000000Z"
+
+
+def test_zero_overlap_starts_at_the_watermark(state, monkeypatch):
+    monkeypatch.setattr(main, "WATERMARK_OVERLAP_SECONDS", 0)
+    main.set_state_value(state, "watermark", "2025-06-02T11:00:00.000000Z")
+    assert main.sync_cutoff(state, NOW) == "2025-06-02T11:00:00.000000Z"
+
+
+def test_cutoff_round_trips_through_the_watermark(state, monkeypatch):
+    monkeypatch.setattr(main, "WATERMARK_OVERLAP_SECONDS", 0)
+    main.set_state_value(state, "watermark", main.format_airtable_time(NOW))
+    assert main.sync_cutoff(state, NOW + datetime.timedelta(hours=1)) == main.format_airtable_time(NOW)
+
+
+def test_watermark_advances_after_a_clean_run(state):
+    main.advance_watermark(state, NOW, {"failed": False})
+    assert main.get_state_value(state, "watermark") == "2025-06-02T12:00:00.000000Z"
+
+
+def test_watermark_stays_when_speaker_changes_were_not_propagated(state):
+    main.set_state_value(state, "watermark", "2025-06-02T11:00:00.000000Z")
+    main.advance_watermark(state, NOW, {"failed": True})
+    assert main.get_state_value(state, "watermark") == "2025-06-02T11:00:00.000000Z"
+
+
+def test_speaker_fetch_failure_is_noted(monkeypatch):
+    def fail(api, since_iso):
+        raise RuntimeError("Speaker table unavailable")
+
+    monkeypatch.setattr(main, "SPEAKER_PROPAGATION", True)
+    monkeypatch.setattr(main, "fetch_modified_speaker_ids", fail)
+    propagation = {"failed": False}
+    assert main.fetch_speaker_changes(None, "2025-06-02T11:00:00.000000Z", propagation) == []
+    assert propagation == {"failed": True}
@@ -0,0 +1,100 @@
+import http.client
+import json
+import queue
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import main
+
+MALICIOUS_ID = "x'), TRUE(), ('"
+
+
+@pytest.fixture
+def daemon():
+    debouncer = main.Debouncer(60, 60)
+    notifications = queue.Queue()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), main.make_webhook_handler(debouncer, notifications))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1], debouncer, notifications
+    server.shutdown()
+    server.server_close()
+
+
+def post(port: int, body: bytes, content_length: str = None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.putrequest("POST", "/")
+    connection.putheader("Content-Length", content_length if content_length is not None else str(len(body)))
+    connection.endheaders()
+    connection.send(body)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.mark.parametrize("payload", [
+    {"recordIds": ["rec12345678901234"]},
+    {"speakerIds": ["recABCDEFGHIJKLMN"], "recordIds": []},
+    {"webhook": {"id": "ach00000000000000"}},
+    {},
+])
+def test_well_formed_payloads_pass(payload):
+    assert main.webhook_payload_error(payload) == ""
+
+
+@pytest.mark.parametrize("payload", [
+    [1, 2],
+    {"recordIds": "recABC"},
+    {"recordIds": ["rec12345678901234", 3]},
+    {"recordIds": [MALICIOUS_ID]},
+    {"speakerIds": ["rec1234567890123"]},
+    {"webhook": "ach1"},
+    {"webhook": {"id": 5}},
+])
+def test_malformed_payloads_are_rejected(payload):
+    assert main.webhook_payload_error(payload)
+
+
+def test_malicious_record_id_gets_400_and_queues_nothing(daemon):
+    port, debouncer, notifications = daemon
+    status, body = post(port, json.dumps({"recordIds": [MALICIOUS_ID], "speakerIds": [MALICIOUS_ID]}).encode())
+    assert status == 400
+    assert "recordIds" in body["error"]
+    assert debouncer.pending() == 0
+    assert notifications.empty()
+
+
+def test_string_record_ids_are_not_split_into_characters(daemon):
+    port, debouncer, _ = daemon
+    status, _ = post(port, json.dumps({"recordIds": "recABC"}).encode())
+    assert status == 400
+    assert debouncer.pending() == 0
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-5"])
+def test_bad_content_length_gets_400(daemon, content_length):
+    port, _, _ = daemon
+    status, body = post(port, b"{}", content_length)
+    assert status == 400
+    assert body == {"error": "invalid Content-Length"}
+
+
+def test_valid_record_ids_are_queued(daemon):
+    port, debouncer, _ = daemon
+    status, body = post(port, json.dumps({"recordIds": ["rec12345678901234", "rec12345678901235"]}).encode())
+    assert status == 200
+    assert body == {"queued": 2}
+
+
+def test_record_ids_are_quoted_in_the_formula(monkeypatch):
+    class Table:
+        def all(self, formula=None, **kwargs):
+            self.formula = formula
+            return []
+
+    table = Table()
+    monkeypatch.setattr(main, "AIRTABLE_LIMITER", main.RateLimiter(0))
+    main.fetch_records_by_id(table, ["rec12345678901234", MALICIOUS_ID, "a\\b"])
+    assert table.formula == ("OR(RECORD_ID() = 'rec12345678901234', RECORD_ID() = 'x\\'), TRUE(), (\\'', "
+                             "RECORD_ID() = 'a\\\\b')")